@@ -0,0 +1,225 @@
+"""
+AegisTrade — Backtester
+Event-driven replay of a candle history through the live strategy, risk and
+execution code, with a simulated router and an in-memory state.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from backend.config.config import (
+    DEFAULT_SYMBOL, INITIAL_CAPITAL, BACKTEST_TRAIN_DAYS, MIN_FEE_PCT,
+)
+from backend.analytics.pnl_engine import PnLEngine
+from backend.execution.adapters.all_adapters import OrderResult
+from backend.execution.engine import ExecutionEngine
+from backend.execution.multi_dex_router import MultiDEXRouter
+from backend.feeds.price_feed import Candle, CandleArray, as_candle_array
+from backend.risk.risk_engine import RiskEngine
+from backend.state.state_manager import StateManager
+from backend.strategy.strategy_engine import (
+    StrategyEngine, StrategyParams, DEFAULT_PARAMS,
+)
+from backend.utils.logger import get_logger
+from backend.utils import ux_effects
+
+log = get_logger(__name__)
+
+
+class SimulatedRouter(MultiDEXRouter):
+    """Fills every order immediately at the requested price plus slippage."""
+
+    def __init__(
+        self,
+        fee_pct: float = MIN_FEE_PCT,
+        slippage_pct: float = 0.0,
+        dex: str = "sim",
+    ) -> None:
+        super().__init__(dry_run=True)
+        self.fee_pct = fee_pct
+        self.slippage_pct = slippage_pct
+        self.dex = dex
+        self.fees_paid = 0.0
+        self._seq = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def route_order(
+        self, symbol: str, side: str, qty: float, price: float
+    ) -> OrderResult:
+        self._seq += 1
+        slip = self.slippage_pct if side == "long" else -self.slippage_pct
+        filled = price * (1 + slip)
+        fee = filled * qty * self.fee_pct
+        self.fees_paid += fee
+        return OrderResult(
+            success=True,
+            dex=self.dex,
+            order_id=f"BT-{self._seq}",
+            filled_price=filled,
+            filled_qty=qty,
+            fee=fee,
+            simulated=True,
+        )
+
+
+@dataclass
+class BacktestResult:
+    symbol: str
+    report: dict
+    trades: List[dict]
+    equity_curve: np.ndarray
+    bars: int
+    fees_paid: float
+    elapsed_s: float
+    params: dict = field(default_factory=dict)
+
+
+@contextmanager
+def _quiet(level: int = logging.CRITICAL) -> Iterator[None]:
+    """Silence per-bar logging and UX events for the duration of a run."""
+    loggers = [
+        logging.getLogger(name)
+        for name in list(logging.root.manager.loggerDict)
+        if name.startswith("backend.") and name != __name__
+    ]
+    levels = [lg.level for lg in loggers]
+    ux_enabled = ux_effects.is_enabled()
+    for lg in loggers:
+        lg.setLevel(level)
+    ux_effects.set_enabled(False)
+    try:
+        yield
+    finally:
+        for lg, lvl in zip(loggers, levels):
+            lg.setLevel(lvl)
+        ux_effects.set_enabled(ux_enabled)
+
+
+class Backtester:
+    def __init__(
+        self,
+        symbol: str = DEFAULT_SYMBOL,
+        starting_balance: float = INITIAL_CAPITAL,
+        window: int = 60,
+        train_bars: int = BACKTEST_TRAIN_DAYS,
+        fee_pct: float = MIN_FEE_PCT,
+        slippage_pct: float = 0.0,
+        auto_unlock: bool = True,
+        params: StrategyParams = DEFAULT_PARAMS,
+    ) -> None:
+        self.symbol = symbol
+        self.starting_balance = starting_balance
+        self.window = window
+        self.train_bars = train_bars
+        self.fee_pct = fee_pct
+        self.slippage_pct = slippage_pct
+        self.auto_unlock = auto_unlock
+        self.params = params
+        self._now = 0.0
+
+    def run(
+        self,
+        candles: Union[CandleArray, Iterable[Candle]],
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+    ) -> BacktestResult:
+        return asyncio.run(self.run_async(candles, start, stop))
+
+    async def run_async(
+        self,
+        candles: Union[CandleArray, Iterable[Candle]],
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+    ) -> BacktestResult:
+        """
+        Fit the regime model on the ``train_bars`` preceding ``start`` and
+        trade bars ``[start, stop)``. ``start`` defaults to right after the
+        training window.
+        """
+        candles = as_candle_array(candles)
+        n = len(candles)
+        if start is None:
+            start = min(max(self.train_bars, self.window), n)
+        stop = n if stop is None else min(stop, n)
+        started = time.perf_counter()
+
+        state = StateManager(
+            persist=False,
+            initial_balance=self.starting_balance,
+            clock=lambda: self._now,
+        )
+        router = SimulatedRouter(self.fee_pct, self.slippage_pct)
+        risk = RiskEngine(state)
+        engine = ExecutionEngine(router, risk, state, dry_run=True)
+        strategy = StrategyEngine(self.params)
+        equity = np.full(max(stop - start, 0), self.starting_balance)
+
+        with _quiet():
+            train = candles[max(0, start - self.train_bars):start]
+            if len(train):
+                strategy.fit_regime(train)
+
+            ts = candles.ts
+            closes = candles.close
+            day = week = None
+            for i in range(start, stop):
+                self._now = float(ts[i])
+                price = float(closes[i])
+
+                d, w = int(self._now // 86400), int(self._now // (7 * 86400))
+                if day is not None and d != day:
+                    await state.daily_reset()
+                    if self.auto_unlock and state.trading_halted:
+                        await state.set_halted(False)
+                if week is not None and w != week:
+                    await state.weekly_reset()
+                    if self.auto_unlock and state.system_locked:
+                        await state.set_locked(False)
+                day, week = d, w
+
+                if state.positions:
+                    await engine.check_open_positions({self.symbol: price})
+
+                if not state.positions and i + 1 >= self.window:
+                    cb = await risk.check_circuit_breakers()
+                    if cb not in ("halt", "lock"):
+                        window = candles[i + 1 - self.window:i + 1]
+                        signal = strategy.generate_signal(window, self.symbol)
+                        if signal.side != "none":
+                            await engine.execute_signal(signal)
+
+                equity[i - start] = state.balance
+
+            for pos_id in list(state.positions):
+                await engine.close_position(pos_id, float(closes[stop - 1]), "end_of_test")
+            if len(equity):
+                equity[-1] = state.balance
+
+        report = PnLEngine().full_report(state.trades, self.starting_balance)
+        elapsed = time.perf_counter() - started
+        log.info(
+            "Backtest %s: %d bars, %d trades, pnl=%.4f in %.2fs",
+            self.symbol, stop - start, report["total_trades"],
+            report["total_pnl"], elapsed,
+        )
+        return BacktestResult(
+            symbol=self.symbol,
+            report=report,
+            trades=list(state.trades),
+            equity_curve=equity,
+            bars=stop - start,
+            fees_paid=round(router.fees_paid, 6),
+            elapsed_s=elapsed,
+            params=asdict(self.params),
+        )
@@ -0,0 +1,240 @@
+"""
+AegisTrade — Parameter Sweep
+Grid search and walk-forward optimisation of StrategyParams over a process
+pool. Candles are placed in shared memory once and every worker maps them
+as a zero-copy CandleArray, so tasks only pickle parameters and bar ranges.
+"""
+from __future__ import annotations
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields, replace
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.config.config import (
+    DEFAULT_SYMBOL, TIMEFRAME, BACKTEST_TRAIN_DAYS, BACKTEST_TEST_DAYS,
+)
+from backend.backtest.backtester import Backtester
+from backend.feeds.price_feed import (
+    Candle, CandleArray, TIMEFRAME_SECONDS, as_candle_array,
+)
+from backend.strategy.strategy_engine import StrategyParams, DEFAULT_PARAMS
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+BARS_PER_DAY: int = 86400 // TIMEFRAME_SECONDS.get(TIMEFRAME, 900)
+
+RANK_COLUMNS = (
+    "total_pnl", "sharpe_ratio", "max_drawdown_pct",
+    "win_rate", "profit_factor", "total_trades",
+)
+
+
+def param_grid(grid: Dict[str, Sequence]) -> List[StrategyParams]:
+    valid = {f.name for f in fields(StrategyParams)}
+    unknown = set(grid) - valid
+    if unknown:
+        raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+    keys = list(grid)
+    return [
+        replace(DEFAULT_PARAMS, **dict(zip(keys, combo)))
+        for combo in product(*(grid[k] for k in keys))
+    ]
+
+
+@dataclass(frozen=True)
+class Fold:
+    index: int
+    train: Tuple[int, int]
+    test: Tuple[int, int]
+
+
+def walk_forward_folds(
+    n_bars: int, train_bars: int, test_bars: int, warmup: int = 0
+) -> List[Fold]:
+    """Rolling train/test windows, stepping forward by one test window."""
+    folds: List[Fold] = []
+    start = warmup
+    while start + train_bars + test_bars <= n_bars:
+        mid = start + train_bars
+        folds.append(Fold(len(folds), (start, mid), (mid, mid + test_bars)))
+        start += test_bars
+    return folds
+
+
+# ── worker side ──────────────────────────────────────────────────────────────
+
+_WORKER_SHM: Optional[shared_memory.SharedMemory] = None
+_WORKER_CANDLES: Optional[CandleArray] = None
+
+
+def _init_worker(shm_name: str, shape: Tuple[int, int]) -> None:
+    global _WORKER_SHM, _WORKER_CANDLES
+    _WORKER_SHM = shared_memory.SharedMemory(name=shm_name)
+    buf = np.ndarray(shape, dtype=np.float64, buffer=_WORKER_SHM.buf)
+    _WORKER_CANDLES = CandleArray.from_buffer(buf)
+
+
+def _run_task(task: dict) -> dict:
+    bt = Backtester(params=task["params"], **task["backtest"])
+    res = bt.run(_WORKER_CANDLES, task["start"], task["stop"])
+    return {
+        "fold": task.get("fold"),
+        "phase": task.get("phase"),
+        "start": task["start"],
+        "stop": task["stop"],
+        "params": res.params,
+        **{k: res.report[k] for k in RANK_COLUMNS},
+        "elapsed_s": round(res.elapsed_s, 3),
+    }
+
+
+# ── driver ───────────────────────────────────────────────────────────────────
+
+def rank(rows: Iterable[dict], by: str = "sharpe_ratio") -> List[dict]:
+    # Drawdown is a cost: smaller is better.
+    reverse = by != "max_drawdown_pct"
+    return sorted(rows, key=lambda r: r[by], reverse=reverse)
+
+
+def format_table(rows: Sequence[dict], columns: Sequence[str] = RANK_COLUMNS) -> str:
+    if not rows:
+        return ""
+    param_keys = list(rows[0]["params"])
+    header = ["#", *param_keys, *columns]
+    lines = [header]
+    for i, r in enumerate(rows, 1):
+        lines.append([
+            str(i),
+            *(str(r["params"][k]) for k in param_keys),
+            *(str(r[c]) for c in columns),
+        ])
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(cell.rjust(w) for cell, w in zip(line, widths))
+        for line in lines
+    )
+
+
+class ParameterSweep:
+    def __init__(
+        self,
+        candles: Union[CandleArray, Iterable[Candle]],
+        symbol: str = DEFAULT_SYMBOL,
+        max_workers: Optional[int] = None,
+        rank_by: str = "sharpe_ratio",
+        **backtest_kwargs,
+    ) -> None:
+        self.candles = as_candle_array(candles)
+        self.symbol = symbol
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.rank_by = rank_by
+        self.backtest_kwargs = {"symbol": symbol, **backtest_kwargs}
+        self._probe = Backtester(**self.backtest_kwargs)
+
+    def _task(
+        self, params: StrategyParams, start: int, stop: int,
+        fold: Optional[int] = None, phase: Optional[str] = None,
+    ) -> dict:
+        return {
+            "params": params, "start": start, "stop": stop,
+            "fold": fold, "phase": phase, "backtest": self.backtest_kwargs,
+        }
+
+    def _map(self, tasks: List[dict]) -> List[dict]:
+        if not tasks:
+            return []
+        src = self.candles.to_buffer()
+        shm = shared_memory.SharedMemory(create=True, size=max(src.nbytes, 1))
+        try:
+            np.ndarray(src.shape, dtype=np.float64, buffer=shm.buf)[:] = src
+            started = time.perf_counter()
+            with ProcessPoolExecutor(
+                max_workers=min(self.max_workers, len(tasks)),
+                initializer=_init_worker,
+                initargs=(shm.name, src.shape),
+            ) as pool:
+                rows = list(pool.map(_run_task, tasks))
+            log.info(
+                "Sweep: %d backtests on %d workers in %.2fs",
+                len(tasks), min(self.max_workers, len(tasks)),
+                time.perf_counter() - started,
+            )
+            return rows
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def grid_search(
+        self,
+        grid: Dict[str, Sequence],
+        start: Optional[int] = None,
+        stop: Optional[int] = None,
+    ) -> List[dict]:
+        n = len(self.candles)
+        if start is None:
+            start = min(max(self._probe.train_bars, self._probe.window), n)
+        stop = n if stop is None else stop
+        rows = self._map([self._task(p, start, stop) for p in param_grid(grid)])
+        return rank(rows, self.rank_by)
+
+    def walk_forward(
+        self,
+        grid: Dict[str, Sequence],
+        train_days: int = BACKTEST_TRAIN_DAYS,
+        test_days: int = BACKTEST_TEST_DAYS,
+    ) -> dict:
+        """
+        For each fold, rank every grid point on the train window and run the
+        winner on the following test window. Returns per-fold in-sample
+        rankings, the out-of-sample rows and their aggregate.
+        """
+        params = param_grid(grid)
+        warmup = max(self._probe.train_bars, self._probe.window)
+        folds = walk_forward_folds(
+            len(self.candles), train_days * BARS_PER_DAY,
+            test_days * BARS_PER_DAY, warmup,
+        )
+        if not folds:
+            raise ValueError(
+                f"Need at least {warmup + (train_days + test_days) * BARS_PER_DAY} "
+                f"bars for one walk-forward fold, got {len(self.candles)}"
+            )
+
+        in_sample = self._map([
+            self._task(p, *f.train, fold=f.index, phase="train")
+            for f in folds for p in params
+        ])
+        by_fold: Dict[int, List[dict]] = {}
+        for row in in_sample:
+            by_fold.setdefault(row["fold"], []).append(row)
+        for fold in by_fold:
+            by_fold[fold] = rank(by_fold[fold], self.rank_by)
+
+        out_of_sample = self._map([
+            self._task(
+                StrategyParams(**by_fold[f.index][0]["params"]),
+                *f.test, fold=f.index, phase="test",
+            )
+            for f in folds
+        ])
+        out_of_sample.sort(key=lambda r: r["fold"])
+
+        sharpes = [r["sharpe_ratio"] for r in out_of_sample]
+        return {
+            "folds": [asdict(f) for f in folds],
+            "in_sample": by_fold,
+            "out_of_sample": out_of_sample,
+            "summary": {
+                "folds": len(folds),
+                "total_pnl": round(sum(r["total_pnl"] for r in out_of_sample), 4),
+                "mean_sharpe": round(float(np.mean(sharpes)), 4),
+                "worst_drawdown_pct": max(r["max_drawdown_pct"] for r in out_of_sample),
+                "total_trades": sum(r["total_trades"] for r in out_of_sample),
+            },
+        }
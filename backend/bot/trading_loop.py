@@ -4,27 +4,34 @@ AegisTrade - Trading Loop
 from __future__ import annotations
 import asyncio
 import time
+from typing import Dict, List
 
 from backend.config.config import (
     DRY_RUN, DEFAULT_SYMBOL, POLL_INTERVAL_S,
     BACKTEST_TRAIN_DAYS, DEFAULT_LANG,
+    SUPPORTED_SYMBOLS, MULTI_SYMBOL, MAX_CONCURRENT_SYMBOLS,
 )
 from backend.state.state_manager import StateManager
-from backend.feeds.price_feed import PriceFeed
-from backend.analytics.pnl_engine import PnLEngine
+from backend.feeds.price_feed import PriceFeed, CandleArray, Ticker
+from backend.feeds.candle_archive import CandleArchive
+from backend.analytics.pnl_engine import PnLEngine, PnLTracker
+from backend.analytics.pnl_rollup import PnLRollup
 from backend.risk.risk_engine import RiskEngine
-from backend.strategy.strategy_engine import StrategyEngine
+from backend.strategy.strategy_engine import StrategyEngine, Signal
 from backend.execution.multi_dex_router import MultiDEXRouter
 from backend.execution.engine import ExecutionEngine
 from backend.utils.logger import get_logger
 from backend.utils.i18n import t, set_language
 from backend.utils import ux_effects
+from backend.utils.event_bus import EVENT_BUS
+from backend.utils.http_client import HttpClient
 
 log = get_logger(__name__)
 
 _RUNNING = False
 _DRY_RUN = DRY_RUN
 _SYMBOL = DEFAULT_SYMBOL
+_MULTI_SYMBOL = MULTI_SYMBOL
 
 
 def set_running(val: bool) -> None:
@@ -42,6 +49,17 @@ def set_symbol(symbol: str) -> None:
     _SYMBOL = symbol
 
 
+def set_multi_symbol(enabled: bool) -> None:
+    global _MULTI_SYMBOL
+    _MULTI_SYMBOL = enabled
+
+
+def active_symbols() -> List[str]:
+    if _MULTI_SYMBOL:
+        return list(SUPPORTED_SYMBOLS)
+    return [_SYMBOL]
+
+
 def is_running() -> bool:
     return _RUNNING
 
@@ -53,71 +71,106 @@ def is_dry_run() -> bool:
 class TradingLoop:
     def __init__(self) -> None:
         self.state = StateManager()
-        self.feed = PriceFeed()
+        self.http = HttpClient()
+        self.archive = CandleArchive()
+        self.feed = PriceFeed(
+            symbols=list(SUPPORTED_SYMBOLS), http=self.http, archive=self.archive
+        )
+        if self.feed.streaming:
+            self.feed.add_listener(self._on_price)
         self.pnl = PnLEngine()
+        self.pnl_tracker = PnLTracker(50.0)
+        self.pnl_rollup = PnLRollup()
+        self.state.add_trade_listener(self.pnl_tracker.on_trade)
+        self.state.add_trade_listener(self.pnl_rollup.on_trade)
+        self.state.add_trade_listener(self._publish_close)
+        self.state.add_position_listener(self._publish_open)
         self.risk = RiskEngine(self.state)
-        self.strategy = StrategyEngine()
-        self.router = MultiDEXRouter(dry_run=_DRY_RUN)
+        self.strategies: Dict[str, StrategyEngine] = {}
+        self.router = MultiDEXRouter(dry_run=_DRY_RUN, http=self.http)
         self.engine = ExecutionEngine(
             self.router, self.risk, self.state, dry_run=_DRY_RUN
         )
         self._last_daily_reset: float = time.time()
         self._last_weekly_reset: float = time.time()
+        self._sem = asyncio.Semaphore(MAX_CONCURRENT_SYMBOLS)
+
+    def metrics(self) -> dict:
+        return {
+            **self.pnl_tracker.report(),
+            "balance": round(self.state.balance, 2),
+            "equity": round(self.state.equity, 2),
+            "daily_pnl": round(self.state.daily_pnl, 2),
+            "weekly_pnl": round(self.state.weekly_pnl, 2),
+            "total_pnl": round(self.state.total_pnl, 2),
+        }
+
+    def _publish_open(self, position: dict) -> None:
+        EVENT_BUS.publish("position", {"event": "opened", **position})
+
+    def _publish_close(self, trade: dict) -> None:
+        EVENT_BUS.publish("position", {"event": "closed", **trade})
+        EVENT_BUS.publish("pnl", self.metrics())
+
+    async def strategy_for(self, symbol: str) -> StrategyEngine:
+        """
+        The symbol's strategy. Its HMM is fitted on first use, so symbols
+        enabled after startup get a fitted regime detector too.
+        """
+        strategy = self.strategies.get(symbol)
+        if strategy is None:
+            strategy = StrategyEngine()
+            self.strategies[symbol] = strategy
+            # With an archived history this only fetches bars since the last one.
+            candles = await self.feed.get_candles(symbol, limit=BACKTEST_TRAIN_DAYS)
+            if candles:
+                strategy.fit_regime(candles)
+                log.info("HMM fitted on %d candles for %s", len(candles), symbol)
+        return strategy
 
     async def _startup(self) -> None:
         set_language(DEFAULT_LANG)
         await self.state.load()
-        await self.feed.start()
-        await self.router.start()
+        await asyncio.to_thread(self.pnl_tracker.seed, self.state.trade_source)
+        await asyncio.to_thread(self.pnl_rollup.seed, self.state.trade_source)
+        await asyncio.gather(self.feed.start(), self.router.start())
         mode_msg = t("dry_run_mode") if _DRY_RUN else t("live_mode")
         log.info(mode_msg)
         log.info(t("bot_started"))
-        candles = await self.feed.get_candles(
-            _SYMBOL, limit=BACKTEST_TRAIN_DAYS
-        )
-        if candles:
-            self.strategy.fit_regime(candles)
-            log.info("HMM fitted on %d candles", len(candles))
+        await asyncio.gather(*(
+            self._limited(self.strategy_for(s)) for s in active_symbols()
+        ))
 
     async def _shutdown(self) -> None:
-        await self.feed.stop()
-        await self.router.stop()
+        await asyncio.gather(self.feed.stop(), self.router.stop())
+        await self.http.close()
+        self.archive.close()
+        await self.state.close()
         log.info(t("bot_stopped"))
 
-    async def _tick(self) -> None:
-        symbol = _SYMBOL
+    async def _on_price(self, ticker: Ticker) -> None:
+        if any(
+            p["symbol"] == ticker.symbol for p in self.state.positions.values()
+        ):
+            await self.engine.check_open_positions({ticker.symbol: ticker.price})
+            await self.state.flush()
 
-        ticker = await self.feed.get_ticker(symbol)
-        if not ticker:
-            log.warning("No price for %s — skipping tick", symbol)
-            return
+    async def _limited(self, coro):
+        async with self._sem:
+            return await coro
 
-        candles = await self.feed.get_candles(symbol, limit=60)
+    async def _trade_symbol(self, symbol: str, candles: CandleArray) -> None:
         if len(candles) < 25:
-            log.debug("Not enough candles yet (%d)", len(candles))
-            return
-
-        now = time.time()
-        if now - self._last_daily_reset > 86400:
-            await self.state.daily_reset()
-            self._last_daily_reset = now
-        if now - self._last_weekly_reset > 7 * 86400:
-            await self.state.weekly_reset()
-            self._last_weekly_reset = now
-
-        await self.engine.check_open_positions({symbol: ticker.price})
-
-        cb = await self.risk.check_circuit_breakers()
-        if cb in ("halt", "lock"):
-            log.info("Circuit breaker active (%s) — skipping", cb)
+            log.debug("Not enough candles yet for %s (%d)", symbol, len(candles))
             return
 
-        if self.state.positions:
-            log.debug("Position already open — waiting")
+        if any(p["symbol"] == symbol for p in self.state.positions.values()):
+            log.debug("Position already open on %s — waiting", symbol)
             return
 
-        signal = self.strategy.generate_signal(candles, symbol)
-        await self.state.update_regime(signal.regime)
+        strategy = await self.strategy_for(symbol)
+        signal: Signal = strategy.generate_signal(candles, symbol)
+        await self.state.update_regime(symbol, signal.regime)
 
         if signal.side != "none":
             log.info(
@@ -129,8 +182,56 @@ class TradingLoop:
         else:
             log.debug(t("no_signal"))
 
-        report = self.pnl.full_report(self.state.trades, 50.0)
-        log.debug("PnL: %s", report)
+    async def _tick(self) -> None:
+        try:
+            symbols = active_symbols()
+            held = {p["symbol"] for p in self.state.positions.values()}
+            tickers = await self.feed.get_tickers(
+                symbols + sorted(held.difference(symbols))
+            )
+            prices = {s: tk.price for s, tk in tickers.items()}
+            for symbol in symbols:
+                if symbol not in tickers:
+                    log.warning("No price for %s — skipping tick", symbol)
+            symbols = [s for s in symbols if s in tickers]
+            if not prices:
+                return
+
+            candle_sets = await asyncio.gather(*(
+                self._limited(self.feed.get_candles(s, limit=60)) for s in symbols
+            ))
+
+            now = time.time()
+            if now - self._last_daily_reset > 86400:
+                await self.state.daily_reset()
+                self._last_daily_reset = now
+            if now - self._last_weekly_reset > 7 * 86400:
+                await self.state.weekly_reset()
+                self._last_weekly_reset = now
+
+            await self.engine.check_open_positions(prices)
+
+            cb = await self.risk.check_circuit_breakers()
+            if cb in ("halt", "lock"):
+                log.info("Circuit breaker active (%s) — skipping", cb)
+                return
+
+            results = await asyncio.gather(
+                *(
+                    self._limited(self._trade_symbol(s, candles))
+                    for s, candles in zip(symbols, candle_sets)
+                ),
+                return_exceptions=True,
+            )
+            for symbol, res in zip(symbols, results):
+                if isinstance(res, Exception):
+                    log.error("Tick error on %s: %s", symbol, res)
+
+            report = self.pnl_tracker.report()
+            log.debug("PnL: %s", report)
+        finally:
+            # Early returns and errors still commit what the tick wrote.
+            await self.state.flush()
 
     async def run(self) -> None:
         global _RUNNING
@@ -3,6 +3,7 @@ AegisTrade - Strategy Engine
 """
 from __future__ import annotations
 from dataclasses import dataclass
+from backend.strategy.indicators import rsi, sma
 from backend.utils.logger import get_logger
 
 log = get_logger(__name__)
@@ -40,16 +41,13 @@ class StrategyEngine:
         try:
             closes = [float(c.get("c", c[-1] if isinstance(c, list) else 0)) for c in candles]
             price = closes[-1]
-            sma20 = sum(closes[-20:]) / 20
-            sma5 = sum(closes[-5:]) / 5
-            gains = [max(closes[i] - closes[i-1], 0) for i in range(-14, 0)]
-            losses = [max(closes[i-1] - closes[i], 0) for i in range(-14, 0)]
-            avg_gain = sum(gains) / 14 or 0.001
-            avg_loss = sum(losses) / 14 or 0.001
-            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
-            if sma5 > sma20 and rsi < 65 and self._regime != "bear":
+            tail = closes[-21:]
+            sma20 = sma(tail, 20)[-1]
+            sma5 = sma(tail, 5)[-1]
+            rsi14 = rsi(tail, 14, smoothing="sma")[-1]
+            if sma5 > sma20 and rsi14 < 65 and self._regime != "bear":
                 return Signal(side="buy", symbol=symbol, price=price, regime=self._regime)
-            elif sma5 < sma20 and rsi > 35 and self._regime != "bull":
+            elif sma5 < sma20 and rsi14 > 35 and self._regime != "bull":
                 return Signal(side="sell", symbol=symbol, price=price, regime=self._regime)
         except Exception as e:
             log.warning("Strategy error: %s", e)
@@ -0,0 +1,316 @@
+"""
+AegisTrade — Indicators
+Streaming O(1)-per-bar updaters and vectorized whole-series versions.
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# ── streaming ────────────────────────────────────────────────────────────────
+
+class SMA:
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self._window: Deque[float] = deque()
+        self._sum = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return len(self._window) == self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self.period if self.ready else None
+
+    def update(self, x: float) -> Optional[float]:
+        self._window.append(x)
+        self._sum += x
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        """Value the SMA would have after ``update(x)``, without committing."""
+        n = len(self._window)
+        if n + 1 < self.period:
+            return None
+        total = self._sum + x
+        if n == self.period:
+            total -= self._window[0]
+        return total / self.period
+
+    def reset(self) -> None:
+        self._window.clear()
+        self._sum = 0.0
+
+
+class _RollingExtreme(ABC):
+    """Monotonic deque over the last ``period`` values."""
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self._q: Deque[Tuple[int, float]] = deque()
+        self._i = 0
+
+    @abstractmethod
+    def _dominates(self, a: float, b: float) -> bool: ...
+
+    @property
+    def ready(self) -> bool:
+        return self._i >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._q[0][1] if self._q else None
+
+    def update(self, x: float) -> Optional[float]:
+        while self._q and not self._dominates(self._q[-1][1], x):
+            self._q.pop()
+        self._q.append((self._i, x))
+        if self._q[0][0] <= self._i - self.period:
+            self._q.popleft()
+        self._i += 1
+        return self.value
+
+    def reset(self) -> None:
+        self._q.clear()
+        self._i = 0
+
+
+class RollingMax(_RollingExtreme):
+    def _dominates(self, a: float, b: float) -> bool:
+        return a > b
+
+
+class RollingMin(_RollingExtreme):
+    def _dominates(self, a: float, b: float) -> bool:
+        return a < b
+
+
+class ATR:
+    """
+    Average true range. ``smoothing="wilder"`` seeds with the mean of the
+    first ``period`` true ranges and then applies Wilder's recursion;
+    ``smoothing="sma"`` is a plain rolling mean of true range.
+    """
+
+    def __init__(self, period: int, smoothing: str = "wilder") -> None:
+        if smoothing not in ("wilder", "sma"):
+            raise ValueError(f"Unknown ATR smoothing: {smoothing}")
+        self.period = period
+        self.smoothing = smoothing
+        self._prev_close: Optional[float] = None
+        self._sma = SMA(period)
+        self._value: Optional[float] = None
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+    def _true_range(self, high: float, low: float) -> Optional[float]:
+        if self._prev_close is None:
+            return None
+        pc = self._prev_close
+        return max(high - low, abs(high - pc), abs(low - pc))
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        tr = self._true_range(high, low)
+        self._prev_close = close
+        if tr is None:
+            return None
+        if self.smoothing == "sma" or self._value is None:
+            self._value = self._sma.update(tr)
+        else:
+            self._value = (self._value * (self.period - 1) + tr) / self.period
+        return self._value
+
+    def peek(self, high: float, low: float) -> Optional[float]:
+        """ATR including a still-forming bar, without committing it."""
+        tr = self._true_range(high, low)
+        if tr is None:
+            return None
+        if self.smoothing == "sma" or self._value is None:
+            return self._sma.peek(tr)
+        return (self._value * (self.period - 1) + tr) / self.period
+
+    def reset(self) -> None:
+        self._prev_close = None
+        self._sma.reset()
+        self._value = None
+
+
+class RSI:
+    """
+    Relative strength index. ``smoothing="wilder"`` is the classic RMA form;
+    ``smoothing="sma"`` averages the last ``period`` gains and losses.
+    """
+
+    def __init__(self, period: int = 14, smoothing: str = "wilder") -> None:
+        if smoothing not in ("wilder", "sma"):
+            raise ValueError(f"Unknown RSI smoothing: {smoothing}")
+        self.period = period
+        self.smoothing = smoothing
+        self._prev: Optional[float] = None
+        self._gain = SMA(period)
+        self._loss = SMA(period)
+        self._avg_gain: Optional[float] = None
+        self._avg_loss: Optional[float] = None
+
+    @property
+    def value(self) -> Optional[float]:
+        if self._avg_gain is None or self._avg_loss is None:
+            return None
+        return _rsi_from_averages(self._avg_gain, self._avg_loss)
+
+    def update(self, close: float) -> Optional[float]:
+        if self._prev is None:
+            self._prev = close
+            return None
+        change = close - self._prev
+        self._prev = close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self.smoothing == "sma" or self._avg_gain is None:
+            self._avg_gain = self._gain.update(gain)
+            self._avg_loss = self._loss.update(loss)
+        else:
+            p = self.period
+            self._avg_gain = (self._avg_gain * (p - 1) + gain) / p
+            self._avg_loss = (self._avg_loss * (p - 1) + loss) / p
+        return self.value
+
+    def reset(self) -> None:
+        self._prev = None
+        self._gain.reset()
+        self._loss.reset()
+        self._avg_gain = None
+        self._avg_loss = None
+
+
+def _rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0:
+        return 50.0 if avg_gain == 0 else 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+# ── vectorized ───────────────────────────────────────────────────────────────
+# Whole-series versions for backtests. Output has the input's length with
+# NaN during warm-up, and value[i] matches the streaming updater after bar i.
+
+# exp(230) ~ 1e100: block scale factors stay far from float64 overflow.
+_MAX_EXP = 230.0
+
+
+def _pad(values: np.ndarray, n: int) -> np.ndarray:
+    out = np.full(n, np.nan)
+    if len(values):
+        out[n - len(values):] = values
+    return out
+
+
+def sma(x: np.ndarray, period: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) < period:
+        return np.full(len(x), np.nan)
+    csum = np.cumsum(np.insert(x, 0, 0.0))
+    return _pad((csum[period:] - csum[:-period]) / period, len(x))
+
+
+def rolling_max(x: np.ndarray, period: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) < period:
+        return np.full(len(x), np.nan)
+    return _pad(sliding_window_view(x, period).max(axis=1), len(x))
+
+
+def rolling_min(x: np.ndarray, period: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) < period:
+        return np.full(len(x), np.nan)
+    return _pad(sliding_window_view(x, period).min(axis=1), len(x))
+
+
+def donchian(
+    high: np.ndarray, low: np.ndarray, period: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    return rolling_max(high, period), rolling_min(low, period)
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range per bar; the first bar has no previous close and is NaN."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) < 2:
+        return np.full(len(close), np.nan)
+    pc = close[:-1]
+    h, lo = high[1:], low[1:]
+    tr = np.maximum(h - lo, np.maximum(np.abs(h - pc), np.abs(lo - pc)))
+    return _pad(tr, len(close))
+
+
+def _wilder(x: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder/RMA smoothing of a series seeded with its first SMA. The
+    recursion y[i] = a * y[i-1] + x[i] / period is unrolled a block at a
+    time: within a block y[s+k] = a**k * (y[s] + sum(a**-j * x[s+j] / period)),
+    a scaled prefix sum, with blocks short enough that a**-k stays finite.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) < period:
+        return out
+    out[period - 1] = x[:period].mean()
+    rest = x[period:] / period
+    alpha = (period - 1) / period
+    if alpha == 0.0:
+        out[period:] = rest
+        return out
+    block = max(1, min(len(rest), int(_MAX_EXP / -np.log(alpha))))
+    k = np.arange(1, block + 1)
+    grow, decay = alpha ** -k, alpha ** k
+    prev = out[period - 1]
+    for start in range(0, len(rest), block):
+        chunk = rest[start:start + block]
+        m = len(chunk)
+        y = decay[:m] * (prev + np.cumsum(chunk * grow[:m]))
+        out[period + start:period + start + m] = y
+        prev = y[-1]
+    return out
+
+
+def atr(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    period: int,
+    smoothing: str = "wilder",
+) -> np.ndarray:
+    tr = true_range(high, low, close)[1:]
+    if smoothing == "sma":
+        return _pad(sma(tr, period), len(close))
+    if smoothing == "wilder":
+        return _pad(_wilder(tr, period), len(close))
+    raise ValueError(f"Unknown ATR smoothing: {smoothing}")
+
+
+def rsi(close: np.ndarray, period: int = 14, smoothing: str = "wilder") -> np.ndarray:
+    close = np.asarray(close, dtype=np.float64)
+    change = np.diff(close)
+    gain = np.maximum(change, 0.0)
+    loss = np.maximum(-change, 0.0)
+    if smoothing == "sma":
+        avg_gain, avg_loss = sma(gain, period), sma(loss, period)
+    elif smoothing == "wilder":
+        avg_gain, avg_loss = _wilder(gain, period), _wilder(loss, period)
+    else:
+        raise ValueError(f"Unknown RSI smoothing: {smoothing}")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    out = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), out)
+    out[np.isnan(avg_gain)] = np.nan
+    return _pad(out, len(close))
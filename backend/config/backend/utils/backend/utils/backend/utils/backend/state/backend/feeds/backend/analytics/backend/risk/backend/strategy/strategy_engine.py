@@ -6,7 +6,7 @@ from __future__ import annotations
 import math
 import uuid
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, Iterable, Optional, Union
 
 import numpy as np
 
@@ -14,13 +14,28 @@ from backend.config.config import (
     TURTLE_LOOKBACK, ATR_PERIOD, ATR_STOP_MULTIPLIER,
     OPENING_RANGE_TP_MULTIPLIER, HMM_MIN_BAR_STABILITY, HMM_N_STATES,
 )
-from backend.feeds.price_feed import Candle
+from backend.feeds.price_feed import Candle, CandleArray, as_candle_array
+from backend.strategy.indicators import ATR, RollingMax, RollingMin, donchian
 from backend.utils.logger import get_logger
 
 log = get_logger(__name__)
 
 REGIME_LABELS = ["crash", "bear", "neutral", "bull", "euphoria"]
 
+Candles = Union[CandleArray, Iterable[Candle]]
+
+
+@dataclass(frozen=True)
+class StrategyParams:
+    turtle_lookback: int = TURTLE_LOOKBACK
+    atr_period: int = ATR_PERIOD
+    atr_stop_multiplier: float = ATR_STOP_MULTIPLIER
+    opening_range_tp_multiplier: float = OPENING_RANGE_TP_MULTIPLIER
+    hmm_n_states: int = HMM_N_STATES
+
+
+DEFAULT_PARAMS = StrategyParams()
+
 
 @dataclass
 class Signal:
@@ -39,40 +54,40 @@ class Signal:
             self.id = str(uuid.uuid4())[:8]
 
 
-def _atr(candles: List[Candle], period: int) -> float:
-    if len(candles) < period + 1:
+def _atr(candles: Candles, period: int) -> float:
+    ca = as_candle_array(candles)
+    if len(ca) < period + 1:
         return 0.0
-    trs = []
-    for i in range(1, len(candles)):
-        c = candles[i]
-        prev_close = candles[i - 1].close
-        tr = max(
-            c.high - c.low,
-            abs(c.high - prev_close),
-            abs(c.low - prev_close)
-        )
-        trs.append(tr)
-    return sum(trs[-period:]) / period
+    high = ca.high[-period:]
+    low = ca.low[-period:]
+    prev_close = ca.close[-period - 1:-1]
+    tr = np.maximum(
+        high - low,
+        np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)),
+    )
+    return float(tr.sum()) / period
 
 
-def _highest_high(candles: List[Candle], n: int) -> float:
-    return max(c.high for c in candles[-n:])
+def _highest_high(candles: Candles, n: int) -> float:
+    return float(as_candle_array(candles).high[-n:].max())
 
 
-def _lowest_low(candles: List[Candle], n: int) -> float:
-    return min(c.low for c in candles[-n:])
+def _lowest_low(candles: Candles, n: int) -> float:
+    return float(as_candle_array(candles).low[-n:].min())
 
 
-def _log_returns(candles: List[Candle]) -> np.ndarray:
-    closes = np.array([c.close for c in candles])
+def _log_returns(candles: Candles) -> np.ndarray:
+    closes = as_candle_array(candles).close
     if len(closes) < 2:
         return np.array([])
     return np.diff(np.log(closes))
 
 
 class RegimeDetector:
-    def __init__(self) -> None:
+    def __init__(self, n_states: int = HMM_N_STATES) -> None:
+        self.n_states = n_states
         self._model = None
+        self._params: Optional[tuple] = None
         self._prev_state: Optional[int] = None
         self._state_count: int = 0
         self._try_init_hmm()
@@ -81,7 +96,7 @@ class RegimeDetector:
         try:
             from hmmlearn import hmm
             self._model = hmm.GaussianHMM(
-                n_components=HMM_N_STATES,
+                n_components=self.n_states,
                 covariance_type="diag",
                 n_iter=100,
                 random_state=42,
@@ -90,23 +105,49 @@ class RegimeDetector:
         except ImportError:
             log.warning("hmmlearn not installed — using fallback")
 
-    def fit(self, candles: List[Candle]) -> None:
+    def fit(self, candles: Candles) -> None:
         if self._model is None or len(candles) < 30:
             return
         rets = _log_returns(candles).reshape(-1, 1)
         try:
             self._model.fit(rets)
+            self._cache_params()
             log.info("HMM fitted on %d bars", len(rets))
         except Exception as e:
             log.warning("HMM fit failed: %s", e)
 
-    def predict(self, candles: List[Candle]) -> str:
+    def _cache_params(self) -> None:
+        m = self._model
+        with np.errstate(divide="ignore"):
+            self._params = (
+                np.log(m.startprob_),
+                np.log(m.transmat_),
+                m.means_[:, 0].copy(),
+                np.diagonal(m.covars_, axis1=1, axis2=2)[:, 0].copy(),
+            )
+
+    def _last_state(self, rets: np.ndarray) -> int:
+        """Final state of the Viterbi path; same result as model.predict()[-1]."""
+        if self._params is None:
+            return int(self._model.predict(rets.reshape(-1, 1))[-1])
+        log_start, log_trans, means, var = self._params
+        emit = -0.5 * (
+            np.log(2 * np.pi * var) + (rets[:, None] - means) ** 2 / var
+        )
+        delta = log_start + emit[0]
+        scores = np.empty_like(log_trans)
+        for e in emit[1:]:
+            np.add(delta[:, None], log_trans, out=scores)
+            np.maximum.reduce(scores, axis=0, out=delta)
+            delta += e
+        return int(np.argmax(delta))
+
+    def predict(self, candles: Candles) -> str:
         if self._model is None or len(candles) < 5:
             return self._volatility_fallback(candles)
-        rets = _log_returns(candles[-30:]).reshape(-1, 1)
+        rets = _log_returns(candles[-30:])
         try:
-            states = self._model.predict(rets)
-            raw_state = int(states[-1])
+            raw_state = self._last_state(rets)
             if raw_state == self._prev_state:
                 self._state_count += 1
             else:
@@ -121,7 +162,7 @@ class RegimeDetector:
             return self._volatility_fallback(candles)
 
     @staticmethod
-    def _volatility_fallback(candles: List[Candle]) -> str:
+    def _volatility_fallback(candles: Candles) -> str:
         if len(candles) < 5:
             return "neutral"
         rets = _log_returns(candles[-20:]) if len(candles) >= 20 else _log_returns(candles)
@@ -140,16 +181,62 @@ class RegimeDetector:
         return "neutral"
 
 
+class _TurtleState:
+    """Donchian channel and ATR over closed bars, fed one bar at a time."""
+
+    def __init__(self, lookback: int, atr_period: int) -> None:
+        self.lookback = lookback
+        self.hh = RollingMax(lookback)
+        self.ll = RollingMin(lookback)
+        self.atr = ATR(atr_period, smoothing="sma")
+        self.last_ts: Optional[float] = None
+
+    def reset(self) -> None:
+        self.hh.reset()
+        self.ll.reset()
+        self.atr.reset()
+        self.last_ts = None
+
+    def sync(self, closed: CandleArray) -> None:
+        ts = closed.ts
+        if self.last_ts is None or not ts[0] <= self.last_ts <= ts[-1]:
+            # First call, or bars were skipped: replay just the needed window.
+            self.reset()
+            start = max(0, len(closed) - max(self.lookback, self.atr.period) - 1)
+        else:
+            start = int(np.searchsorted(ts, self.last_ts, side="right"))
+        for h, l, c in zip(
+            closed.high[start:].tolist(),
+            closed.low[start:].tolist(),
+            closed.close[start:].tolist(),
+        ):
+            self.hh.update(h)
+            self.ll.update(l)
+            self.atr.update(h, l, c)
+        self.last_ts = float(ts[-1])
+
+
 class TurtleStrategy:
-    def generate(self, candles: List[Candle], symbol: str) -> Signal:
-        if len(candles) < TURTLE_LOOKBACK + ATR_PERIOD + 2:
+    def __init__(self, params: StrategyParams = DEFAULT_PARAMS) -> None:
+        self.params = params
+        self._states: Dict[str, _TurtleState] = {}
+
+    def generate(self, candles: Candles, symbol: str) -> Signal:
+        p = self.params
+        candles = as_candle_array(candles)
+        if len(candles) < p.turtle_lookback + p.atr_period + 2:
             return Signal("none", "turtle", symbol, 0, 0, 0, "neutral")
         current = candles[-1]
         price = current.close
-        atr = _atr(candles, ATR_PERIOD)
-        hh = _highest_high(candles[:-1], TURTLE_LOOKBACK)
-        ll = _lowest_low(candles[:-1], TURTLE_LOOKBACK)
-        stop_distance = ATR_STOP_MULTIPLIER * atr
+        state = self._states.get(symbol)
+        if state is None:
+            state = _TurtleState(p.turtle_lookback, p.atr_period)
+            self._states[symbol] = state
+        state.sync(candles[:-1])
+        atr = state.atr.peek(current.high, current.low) or 0.0
+        hh = state.hh.value
+        ll = state.ll.value
+        stop_distance = p.atr_stop_multiplier * atr
         if current.high > hh:
             stop = price - stop_distance
             tp = price + stop_distance * 2
@@ -162,17 +249,22 @@ class TurtleStrategy:
 
 
 class FirstCandleStrategy:
-    def generate(self, candles: List[Candle], symbol: str) -> Signal:
+    def __init__(self, params: StrategyParams = DEFAULT_PARAMS) -> None:
+        self.params = params
+
+    def generate(self, candles: Candles, symbol: str) -> Signal:
+        candles = as_candle_array(candles)
         if len(candles) < 5:
             return Signal("none", "first_candle", symbol, 0, 0, 0, "neutral")
-        range_high = max(candles[0].high, candles[1].high)
-        range_low = min(candles[0].low, candles[1].low)
+        upper, lower = donchian(candles.high[:2], candles.low[:2], 2)
+        range_high = float(upper[-1])
+        range_low = float(lower[-1])
         range_size = range_high - range_low
         if range_size == 0:
             return Signal("none", "first_candle", symbol, 0, 0, 0, "neutral")
         current = candles[-1]
         price = current.close
-        tp_distance = range_size * OPENING_RANGE_TP_MULTIPLIER
+        tp_distance = range_size * self.params.opening_range_tp_multiplier
         if current.high > range_high and current.close > range_high:
             return Signal("long", "first_candle", symbol, price, range_low, price + tp_distance, "neutral")
         if current.low < range_low and current.close < range_low:
@@ -181,15 +273,17 @@ class FirstCandleStrategy:
 
 
 class StrategyEngine:
-    def __init__(self) -> None:
-        self.regime_detector = RegimeDetector()
-        self.turtle = TurtleStrategy()
-        self.first_candle = FirstCandleStrategy()
+    def __init__(self, params: StrategyParams = DEFAULT_PARAMS) -> None:
+        self.params = params
+        self.regime_detector = RegimeDetector(params.hmm_n_states)
+        self.turtle = TurtleStrategy(params)
+        self.first_candle = FirstCandleStrategy(params)
 
-    def fit_regime(self, candles: List[Candle]) -> None:
-        self.regime_detector.fit(candles)
+    def fit_regime(self, candles: Candles) -> None:
+        self.regime_detector.fit(as_candle_array(candles))
 
-    def generate_signal(self, candles: List[Candle], symbol: str) -> Signal:
+    def generate_signal(self, candles: Candles, symbol: str) -> Signal:
+        candles = as_candle_array(candles)
         if not candles:
             return Signal("none", "none", symbol, 0, 0, 0, "neutral")
         regime = self.regime_detector.predict(candles)
@@ -209,4 +303,4 @@ class StrategyEngine:
                 sig.side = "none"
                 sig.strategy = "none"
             return sig
-        return Signal("none", "none", symbol, candles[-1].close, 0, 0, regime)
+        return Signal("none", "none", symbol, float(candles.close[-1]), 0, 0, regime)
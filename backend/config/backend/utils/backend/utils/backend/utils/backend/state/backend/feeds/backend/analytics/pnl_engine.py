@@ -3,12 +3,32 @@ AegisTrade — PnL Engine
 """
 from __future__ import annotations
 import math
-from typing import List, Dict
+from typing import Any, Dict, List, Mapping, Sequence, Union
 
+import numpy as np
+
+from backend.state.storage import TradeQueryStore, filter_trades
 from backend.utils.logger import get_logger
 
 log = get_logger(__name__)
 
+# Either an in-memory trade list or a store that aggregates on its side.
+TradeSource = Union[List[dict], TradeQueryStore]
+# Trades as parallel columns, e.g. {"pnl": ndarray, "closed_at": ndarray}.
+TradeColumns = Mapping[str, np.ndarray]
+
+BARS_PER_YEAR = 365 * 24 * 4
+
+EMPTY_REPORT = {
+    "total_trades": 0,
+    "total_pnl": 0.0,
+    "win_rate": 0.0,
+    "profit_factor": 0.0,
+    "max_drawdown_pct": 0.0,
+    "sharpe_ratio": 0.0,
+    "avg_pnl_per_trade": 0.0,
+}
+
 
 class PnLEngine:
 
@@ -54,52 +74,364 @@ class PnLEngine:
         std = math.sqrt(variance)
         if std == 0:
             return 0.0
-        bars_per_year = 365 * 24 * 4
-        return ((mean - rf) / std) * math.sqrt(bars_per_year)
+        return ((mean - rf) / std) * math.sqrt(BARS_PER_YEAR)
+
+    @staticmethod
+    def trade_stats(trades: List[dict], starting_balance: float) -> dict:
+        """Additive aggregates that full_report is derived from."""
+        equity = starting_balance
+        peak = equity
+        max_dd = 0.0
+        returns = []
+        wins = 0
+        gross_profit = gross_loss = 0.0
+        for t in trades:
+            pnl = t["pnl"]
+            if pnl > 0:
+                wins += 1
+                gross_profit += pnl
+            elif pnl < 0:
+                gross_loss += pnl
+            returns.append(pnl / equity if equity else 0)
+            equity += pnl
+            if equity > peak:
+                peak = equity
+            dd = (peak - equity) / peak if peak > 0 else 0
+            max_dd = max(max_dd, dd)
+        n = len(returns)
+        mean = sum(returns) / n if n else 0.0
+        return {
+            "count": n,
+            "total_pnl": sum(t["pnl"] for t in trades),
+            "wins": wins,
+            "gross_profit": gross_profit,
+            "gross_loss": gross_loss,
+            "max_drawdown": max_dd,
+            "peak_equity": peak,
+            "mean_return": mean,
+            "ss_return": sum((r - mean) ** 2 for r in returns),
+        }
+
+    @staticmethod
+    def report_from_stats(stats: dict) -> dict:
+        n = stats["count"]
+        if not n:
+            return dict(EMPTY_REPORT)
+        gross_loss = abs(stats["gross_loss"])
+        if gross_loss == 0:
+            pf = float("inf") if stats["gross_profit"] > 0 else 0.0
+        else:
+            pf = stats["gross_profit"] / gross_loss
+        sharpe = 0.0
+        if n >= 2:
+            std = math.sqrt(stats["ss_return"] / (n - 1))
+            if std != 0:
+                sharpe = (stats["mean_return"] / std) * math.sqrt(BARS_PER_YEAR)
+        return {
+            "total_trades": n,
+            "total_pnl": round(stats["total_pnl"], 4),
+            "win_rate": round(stats["wins"] / n, 4),
+            "profit_factor": round(pf, 4),
+            "max_drawdown_pct": round(stats["max_drawdown"] * 100, 2),
+            "sharpe_ratio": round(sharpe, 4),
+            "avg_pnl_per_trade": round(stats["total_pnl"] / n, 4),
+        }
 
     def full_report(
         self,
-        trades: List[dict],
+        trades: TradeSource,
         starting_balance: float,
+        **filters: Any,
     ) -> dict:
-        if not trades:
+        if isinstance(trades, TradeQueryStore):
+            stats = trades.trade_stats(starting_balance, **filters).get(None)
+            return self.report_from_stats(stats) if stats else dict(EMPTY_REPORT)
+        trades = filter_trades(trades, **filters)
+        return self.report_from_stats(self.trade_stats(trades, starting_balance))
+
+    def grouped_report(
+        self,
+        trades: TradeSource,
+        key: str,
+        starting_balance: float = 0,
+        **filters: Any,
+    ) -> Dict[str, dict]:
+        if isinstance(trades, TradeQueryStore):
             return {
-                "total_trades": 0,
-                "total_pnl": 0.0,
-                "win_rate": 0.0,
-                "profit_factor": 0.0,
-                "max_drawdown_pct": 0.0,
-                "sharpe_ratio": 0.0,
-                "avg_pnl_per_trade": 0.0,
+                g: self.report_from_stats(stats)
+                for g, stats in trades.trade_stats(
+                    starting_balance, group_by=key, **filters
+                ).items()
             }
+        groups: Dict[str, List[dict]] = {}
+        for t in filter_trades(trades, **filters):
+            groups.setdefault(t[key], []).append(t)
+        return {
+            g: self.full_report(group, starting_balance)
+            for g, group in groups.items()
+        }
 
-        pnl_list = [t["pnl"] for t in trades]
-        equity = starting_balance
-        equity_curve = [equity]
-        returns = []
-        for pnl in pnl_list:
-            returns.append(pnl / equity if equity else 0)
-            equity += pnl
-            equity_curve.append(equity)
+    def by_symbol(self, trades: TradeSource, **filters: Any) -> Dict[str, dict]:
+        return self.grouped_report(trades, "symbol", **filters)
 
+    def by_strategy(self, trades: TradeSource, **filters: Any) -> Dict[str, dict]:
+        return self.grouped_report(trades, "strategy", **filters)
+
+    def batch_report(
+        self,
+        trades: Union[List[dict], TradeColumns],
+        starting_balance: float,
+        period_s: float = 86400,
+    ) -> dict:
+        """
+        Vectorized full_report for large histories (backtests), plus the
+        equity curve, drawdown series and returns per ``period_s`` bucket
+        of ``closed_at``.
+        """
+        cols = trade_columns(trades, ("pnl", "closed_at"))
+        pnl = cols["pnl"]
+        curve = equity_curve(pnl, starting_balance)
+        dd = drawdown_series(curve)
+        report = self.report_from_stats(_vector_stats(pnl, curve, dd))
         return {
-            "total_trades": len(trades),
-            "total_pnl": round(self.total_pnl(trades), 4),
-            "win_rate": round(self.win_rate(trades), 4),
-            "profit_factor": round(self.profit_factor(trades), 4),
-            "max_drawdown_pct": round(self.max_drawdown(equity_curve) * 100, 2),
-            "sharpe_ratio": round(self.sharpe_ratio(returns), 4),
-            "avg_pnl_per_trade": round(self.total_pnl(trades) / len(trades), 4),
+            "report": report,
+            "equity_curve": curve,
+            "drawdown": dd,
+            "period_returns": period_returns(curve, cols["closed_at"], period_s),
         }
 
-    def by_symbol(self, trades: List[dict]) -> Dict[str, dict]:
-        groups: Dict[str, List[dict]] = {}
-        for t in trades:
-            groups.setdefault(t["symbol"], []).append(t)
-        return {sym: self.full_report(g, 0) for sym, g in groups.items()}
+    def batch_grouped_report(
+        self,
+        trades: Union[List[dict], TradeColumns],
+        key: str,
+        starting_balance: float = 0,
+    ) -> Dict[str, dict]:
+        """Vectorized grouped_report: one stable sort, then per-segment stats."""
+        cols = trade_columns(trades, ("pnl", key))
+        labels, codes = np.unique(cols[key], return_inverse=True)
+        order = np.argsort(codes, kind="stable")
+        pnl = cols["pnl"][order]
+        starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+        ends = np.r_[starts[1:], len(pnl)]
+        out: Dict[str, dict] = {}
+        for label, lo, hi in zip(labels, starts, ends):
+            seg = pnl[lo:hi]
+            curve = equity_curve(seg, starting_balance)
+            out[label.item()] = self.report_from_stats(
+                _vector_stats(seg, curve, drawdown_series(curve))
+            )
+        return out
 
-    def by_strategy(self, trades: List[dict]) -> Dict[str, dict]:
-        groups: Dict[str, List[dict]] = {}
+
+class PnLAccumulator:
+    """
+    Running version of ``PnLEngine.trade_stats``: O(1) per trade, with
+    Welford's update for the return variance. ``report()`` matches
+    ``full_report`` over the same trades.
+    """
+
+    def __init__(self, starting_balance: float = 0.0) -> None:
+        self.starting_balance = starting_balance
+        self.count = 0
+        self.total_pnl = 0.0
+        self.wins = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.equity = starting_balance
+        self.peak_equity = starting_balance
+        self.max_drawdown = 0.0
+        self._sum_return = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    @classmethod
+    def from_stats(cls, stats: dict, starting_balance: float) -> "PnLAccumulator":
+        acc = cls(starting_balance)
+        acc.count = stats["count"]
+        acc.total_pnl = stats["total_pnl"]
+        acc.wins = stats["wins"]
+        acc.gross_profit = stats["gross_profit"]
+        acc.gross_loss = stats["gross_loss"]
+        acc.equity = starting_balance + stats["total_pnl"]
+        acc.peak_equity = stats["peak_equity"]
+        acc.max_drawdown = stats["max_drawdown"]
+        acc._mean = stats["mean_return"]
+        acc._sum_return = stats["mean_return"] * stats["count"]
+        acc._m2 = stats["ss_return"]
+        return acc
+
+    def add(self, pnl: float) -> None:
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.gross_loss += pnl
+        ret = pnl / self.equity if self.equity else 0
+        self.count += 1
+        self._sum_return += ret
+        delta = ret - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (ret - self._mean)
+
+        self.total_pnl += pnl
+        self.equity += pnl
+        if self.equity > self.peak_equity:
+            self.peak_equity = self.equity
+        peak = self.peak_equity
+        dd = (peak - self.equity) / peak if peak > 0 else 0
+        if dd > self.max_drawdown:
+            self.max_drawdown = dd
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "total_pnl": self.total_pnl,
+            "wins": self.wins,
+            "gross_profit": self.gross_profit,
+            "gross_loss": self.gross_loss,
+            "max_drawdown": self.max_drawdown,
+            "peak_equity": self.peak_equity,
+            "mean_return": self._sum_return / self.count if self.count else 0.0,
+            "ss_return": self._m2,
+        }
+
+    def report(self) -> dict:
+        return PnLEngine.report_from_stats(self.stats())
+
+
+class PnLTracker:
+    """
+    Live PnL state for the bot: an overall accumulator plus one per symbol
+    and per strategy, matching full_report/by_symbol/by_strategy. Register
+    ``on_trade`` with ``StateManager.add_trade_listener``.
+    """
+
+    def __init__(
+        self,
+        starting_balance: float,
+        groups: Sequence[str] = ("symbol", "strategy"),
+    ) -> None:
+        self.starting_balance = starting_balance
+        self.groups = tuple(groups)
+        self.total = PnLAccumulator(starting_balance)
+        self.by_group: Dict[str, Dict[str, PnLAccumulator]] = {
+            g: {} for g in self.groups
+        }
+
+    def seed(self, trades: TradeSource) -> None:
+        """Rebuild from history once, e.g. after ``StateManager.load``."""
+        self.total = PnLAccumulator(self.starting_balance)
+        self.by_group = {g: {} for g in self.groups}
+        if isinstance(trades, TradeQueryStore):
+            stats = trades.trade_stats(self.starting_balance).get(None)
+            if stats:
+                self.total = PnLAccumulator.from_stats(stats, self.starting_balance)
+            for g in self.groups:
+                self.by_group[g] = {
+                    key: PnLAccumulator.from_stats(s, 0.0)
+                    for key, s in trades.trade_stats(0.0, group_by=g).items()
+                }
+            return
         for t in trades:
-            groups.setdefault(t["strategy"], []).append(t)
-        return {s: self.full_report(g, 0) for s, g in groups.items()}
+            self.on_trade(t)
+
+    def on_trade(self, trade: dict) -> None:
+        pnl = trade["pnl"]
+        self.total.add(pnl)
+        for g, accs in self.by_group.items():
+            key = trade.get(g)
+            acc = accs.get(key)
+            if acc is None:
+                acc = accs[key] = PnLAccumulator(0.0)
+            acc.add(pnl)
+
+    def report(self) -> dict:
+        return self.total.report()
+
+    def grouped_report(self, group: str) -> Dict[str, dict]:
+        return {k: acc.report() for k, acc in self.by_group[group].items()}
+
+    def by_symbol(self) -> Dict[str, dict]:
+        return self.grouped_report("symbol")
+
+    def by_strategy(self) -> Dict[str, dict]:
+        return self.grouped_report("strategy")
+
+
+# ── vectorized ───────────────────────────────────────────────────────────────
+# Equity accumulates left to right from the starting balance exactly as the
+# scalar loop does, so reports agree with full_report after rounding.
+
+def trade_columns(
+    trades: Union[List[dict], TradeColumns], keys: Sequence[str]
+) -> Dict[str, np.ndarray]:
+    if isinstance(trades, Mapping):
+        return {k: np.asarray(trades[k]) for k in keys}
+    n = len(trades)
+    cols: Dict[str, np.ndarray] = {}
+    for k in keys:
+        if k in ("pnl", "closed_at", "opened_at", "qty", "entry_price", "exit_price"):
+            cols[k] = np.fromiter((t[k] for t in trades), dtype=np.float64, count=n)
+        else:
+            cols[k] = np.array([t[k] for t in trades], dtype=object).astype(str)
+    return cols
+
+
+def equity_curve(pnl: np.ndarray, starting_balance: float) -> np.ndarray:
+    """Balance before the first trade and after each one (length n + 1)."""
+    return np.cumsum(np.concatenate(([starting_balance], pnl)))
+
+
+def drawdown_series(curve: np.ndarray) -> np.ndarray:
+    peak = np.maximum.accumulate(curve)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, (peak - curve) / peak, 0.0)
+    return dd
+
+
+def trade_returns(pnl: np.ndarray, curve: np.ndarray) -> np.ndarray:
+    prev = curve[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(prev != 0, pnl / prev, 0.0)
+
+
+def period_returns(
+    curve: np.ndarray, closed_at: np.ndarray, period_s: float
+) -> Dict[str, np.ndarray]:
+    """
+    Closing equity and simple return of each ``period_s`` bucket that had
+    trades. Trades are assumed to be in close order.
+    """
+    if not len(closed_at):
+        empty = np.empty(0)
+        return {"period_start": empty, "equity": empty, "returns": empty}
+    bucket = np.floor(np.asarray(closed_at, dtype=np.float64) / period_s)
+    last = np.flatnonzero(np.r_[bucket[1:] != bucket[:-1], True])
+    closing = curve[last + 1]
+    opening = np.r_[curve[0], closing[:-1]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets = np.where(opening != 0, closing / opening - 1.0, 0.0)
+    return {
+        "period_start": bucket[last] * period_s,
+        "equity": closing,
+        "returns": rets,
+    }
+
+
+def _vector_stats(pnl: np.ndarray, curve: np.ndarray, dd: np.ndarray) -> dict:
+    n = len(pnl)
+    if not n:
+        return {"count": 0}
+    rets = trade_returns(pnl, curve)
+    mean = np.cumsum(rets)[-1] / n
+    return {
+        "count": n,
+        "total_pnl": float(np.cumsum(pnl)[-1]),
+        "wins": int(np.count_nonzero(pnl > 0)),
+        "gross_profit": float(pnl[pnl > 0].sum()),
+        "gross_loss": float(pnl[pnl < 0].sum()),
+        "max_drawdown": float(dd.max()),
+        "peak_equity": float(curve.max()),
+        "mean_return": float(mean),
+        "ss_return": float(np.square(rets - mean).sum()),
+    }
@@ -0,0 +1,174 @@
+"""
+AegisTrade — PnL Rollups
+Hourly, daily and weekly PnL aggregates keyed by closed_at bucket, symbol,
+strategy and dex. Updated per closed trade; range queries touch only the
+buckets in range.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from backend.state.storage import TradeQueryStore
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Weeks start on Monday; the epoch fell on a Thursday.
+WEEK_OFFSET_S = 4 * 86400
+
+RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    "hour": (3600, 0),
+    "day": (86400, 0),
+    "week": (7 * 86400, WEEK_OFFSET_S),
+}
+
+DIMENSIONS = ("symbol", "strategy", "dex")
+
+Key = Tuple[str, str, str]
+
+
+@dataclass
+class RollupBucket:
+    count: int = 0
+    wins: int = 0
+    pnl: float = 0.0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0
+    fees: float = 0.0
+    max_adverse_pct: float = 0.0
+
+    def add(self, pnl: float, fee: float, adverse_pct: float) -> None:
+        self.count += 1
+        self.pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.gross_loss += pnl
+        self.fees += fee
+        if adverse_pct > self.max_adverse_pct:
+            self.max_adverse_pct = adverse_pct
+
+    def merge(self, other: "RollupBucket") -> None:
+        self.count += other.count
+        self.wins += other.wins
+        self.pnl += other.pnl
+        self.gross_profit += other.gross_profit
+        self.gross_loss += other.gross_loss
+        self.fees += other.fees
+        self.max_adverse_pct = max(self.max_adverse_pct, other.max_adverse_pct)
+
+
+def bucket_start(ts: float, resolution: str) -> int:
+    size, offset = RESOLUTIONS[resolution]
+    return int((ts - offset) // size) * size + offset
+
+
+class _Series:
+    """Buckets of one resolution, ordered by start time."""
+
+    def __init__(self) -> None:
+        self.starts: List[int] = []
+        self.buckets: Dict[int, Dict[Key, RollupBucket]] = {}
+
+    def slot(self, start: int) -> Dict[Key, RollupBucket]:
+        slot = self.buckets.get(start)
+        if slot is None:
+            slot = self.buckets[start] = {}
+            # Trades close in time order, so this is almost always an append.
+            if not self.starts or start > self.starts[-1]:
+                self.starts.append(start)
+            else:
+                self.starts.insert(bisect_left(self.starts, start), start)
+        return slot
+
+
+class PnLRollup:
+    def __init__(self, resolutions: Sequence[str] = tuple(RESOLUTIONS)) -> None:
+        unknown = set(resolutions) - set(RESOLUTIONS)
+        if unknown:
+            raise ValueError(f"Unknown rollup resolutions: {sorted(unknown)}")
+        self._series: Dict[str, _Series] = {r: _Series() for r in resolutions}
+
+    @property
+    def resolutions(self) -> List[str]:
+        return list(self._series)
+
+    def seed(self, trades: Union[List[dict], TradeQueryStore]) -> None:
+        """Rebuild from history once, e.g. after ``StateManager.load``."""
+        self._series = {r: _Series() for r in self._series}
+        if isinstance(trades, TradeQueryStore):
+            for res, series in self._series.items():
+                size, offset = RESOLUTIONS[res]
+                for row in trades.trade_rollups(size, offset):
+                    key = (row["symbol"], row["strategy"], row["dex"])
+                    series.slot(int(row["bucket"]))[key] = RollupBucket(
+                        count=row["count"],
+                        wins=row["wins"],
+                        pnl=row["pnl"],
+                        gross_profit=row["gross_profit"],
+                        gross_loss=row["gross_loss"],
+                        fees=row["fees"],
+                        max_adverse_pct=row["max_adverse_pct"],
+                    )
+            return
+        for t in trades:
+            self.on_trade(t)
+
+    def on_trade(self, trade: dict) -> None:
+        key = (trade["symbol"], trade["strategy"], trade.get("dex", ""))
+        pnl = trade["pnl"]
+        fee = trade.get("fee", 0.0)
+        adverse = trade.get("max_adverse_pct", 0.0)
+        for res, series in self._series.items():
+            slot = series.slot(bucket_start(trade["closed_at"], res))
+            bucket = slot.get(key)
+            if bucket is None:
+                bucket = slot[key] = RollupBucket()
+            bucket.add(pnl, fee, adverse)
+
+    def query(
+        self,
+        resolution: str = "day",
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        group_by: Sequence[str] = (),
+        symbol: Optional[str] = None,
+        strategy: Optional[str] = None,
+        dex: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Buckets whose start lies in ``[since, until)``, merged down to the
+        ``group_by`` dimensions (any of symbol, strategy, dex).
+        """
+        series = self._series.get(resolution)
+        if series is None:
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+        bad = set(group_by) - set(DIMENSIONS)
+        if bad:
+            raise ValueError(f"Cannot group rollups by {sorted(bad)}")
+        idx = [DIMENSIONS.index(d) for d in group_by]
+        want = (symbol, strategy, dex)
+
+        lo = 0 if since is None else bisect_left(series.starts, since)
+        hi = len(series.starts) if until is None else bisect_left(series.starts, until)
+        rows: List[dict] = []
+        for start in series.starts[lo:hi]:
+            merged: Dict[tuple, RollupBucket] = {}
+            for key, bucket in series.buckets[start].items():
+                if any(w is not None and w != k for w, k in zip(want, key)):
+                    continue
+                group = tuple(key[i] for i in idx)
+                acc = merged.get(group)
+                if acc is None:
+                    acc = merged[group] = RollupBucket()
+                acc.merge(bucket)
+            for group, bucket in merged.items():
+                rows.append({
+                    "bucket": start,
+                    **dict(zip(group_by, group)),
+                    **asdict(bucket),
+                    "net_pnl": bucket.pnl - bucket.fees,
+                })
+        return rows
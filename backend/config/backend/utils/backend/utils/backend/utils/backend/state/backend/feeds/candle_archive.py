@@ -0,0 +1,162 @@
+"""
+AegisTrade — Candle Archive
+On-disk candle history, one file per symbol and timeframe. Each file is a
+float64 block of shape (capacity, 6), one row per bar, so appends are
+contiguous writes and growth only extends the file: bars already on disk
+never move. Range reads are zero-copy (transposed) views of a read-only
+memory map. A small JSON sidecar holds the bar count and is rewritten after
+the bars, making it the commit point for appends.
+"""
+from __future__ import annotations
+import json
+import os
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.config.config import CANDLE_ARCHIVE_DIR
+from backend.feeds.price_feed import Candle, CandleArray, as_candle_array
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+FIELDS = len(CandleArray.FIELDS)
+ROW_BYTES = FIELDS * np.dtype(np.float64).itemsize
+MIN_CAPACITY = 4096
+
+
+class _Series:
+    def __init__(self, data_path: str, meta_path: str) -> None:
+        self.data_path = data_path
+        self.meta_path = meta_path
+        self.count = 0
+        self.capacity = 0
+        self.mm: Optional[np.memmap] = None
+        self._reader: Optional[np.memmap] = None
+        if os.path.exists(meta_path) and os.path.exists(data_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            # Capacity comes from the file itself, so a crash between
+            # growing the file and committing the count cannot skew it.
+            self.capacity = os.path.getsize(data_path) // ROW_BYTES
+            self.count = min(int(meta["count"]), self.capacity)
+            if self.capacity:
+                self._map()
+
+    def _map(self) -> None:
+        self.mm = np.memmap(
+            self.data_path, dtype=np.float64, mode="r+", shape=(self.capacity, FIELDS)
+        )
+
+    def reader(self) -> np.memmap:
+        """Read-only map of the same file, so views cannot write back."""
+        if self._reader is None or self._reader.shape[0] != self.capacity:
+            self._reader = np.memmap(
+                self.data_path, dtype=np.float64, mode="r",
+                shape=(self.capacity, FIELDS),
+            )
+        return self._reader
+
+    def reserve(self, extra: int) -> None:
+        if self.count + extra <= self.capacity:
+            return
+        capacity = max(MIN_CAPACITY, 2 * self.capacity, self.count + extra)
+        if self.mm is not None:
+            self.mm.flush()
+        # Extend in place: committed rows stay where they are, and views
+        # handed out earlier keep their own mapping until dropped.
+        with open(self.data_path, "ab") as f:
+            f.truncate(capacity * ROW_BYTES)
+        self.capacity = capacity
+        self._map()
+
+    def commit(self) -> None:
+        self.mm.flush()
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"count": self.count}, f)
+        os.replace(tmp, self.meta_path)
+
+
+class CandleArchive:
+    def __init__(self, root: str = CANDLE_ARCHIVE_DIR) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._series: Dict[Tuple[str, str], _Series] = {}
+
+    def _get(self, symbol: str, timeframe: str) -> _Series:
+        key = (symbol, timeframe)
+        series = self._series.get(key)
+        if series is None:
+            base = os.path.join(self.root, f"{symbol}_{timeframe}")
+            series = self._series[key] = _Series(base + ".f64", base + ".json")
+        return series
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        return self._get(symbol, timeframe).count
+
+    def last_ts(self, symbol: str, timeframe: str) -> Optional[float]:
+        series = self._get(symbol, timeframe)
+        return float(series.mm[series.count - 1, 0]) if series.count else None
+
+    def append(
+        self, symbol: str, timeframe: str,
+        candles: Union[CandleArray, Iterable[Candle]],
+    ) -> int:
+        """
+        Store bars newer than the last archived one; a bar with the same
+        timestamp as the last replaces it, since it may have been forming.
+        Older bars are ignored. Returns the number of bars added.
+        """
+        bars = as_candle_array(candles)
+        if not len(bars):
+            return 0
+        rows = bars.to_buffer().T
+        rows = rows[np.argsort(rows[:, 0], kind="stable")]
+        series = self._get(symbol, timeframe)
+        if series.count:
+            last = series.mm[series.count - 1, 0]
+            same = rows[:, 0] == last
+            if same.any():
+                series.mm[series.count - 1] = rows[np.flatnonzero(same)[-1]]
+            rows = rows[rows[:, 0] > last]
+        if len(rows):
+            # Keep the last of any duplicate timestamps.
+            keep = np.append(rows[1:, 0] != rows[:-1, 0], True)
+            rows = rows[keep]
+        k = len(rows)
+        if k:
+            series.reserve(k)
+            series.mm[series.count:series.count + k] = rows
+            series.count += k
+        if series.mm is not None:
+            series.commit()
+        return k
+
+    def read(
+        self, symbol: str, timeframe: str,
+        start: Optional[float] = None, end: Optional[float] = None,
+    ) -> CandleArray:
+        """Bars with ``start <= ts < end``, as a view of the memory map."""
+        series = self._get(symbol, timeframe)
+        if not series.count:
+            return CandleArray()
+        mm = series.reader()
+        ts = mm[:series.count, 0]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, "left"))
+        hi = series.count if end is None else int(np.searchsorted(ts, end, "left"))
+        return CandleArray.from_buffer(mm[lo:max(lo, hi)].T)
+
+    def tail(self, symbol: str, timeframe: str, n: int) -> CandleArray:
+        series = self._get(symbol, timeframe)
+        if not series.count:
+            return CandleArray()
+        return CandleArray.from_buffer(
+            series.reader()[max(series.count - n, 0):series.count].T
+        )
+
+    def close(self) -> None:
+        for series in self._series.values():
+            if series.mm is not None:
+                series.mm.flush()
+        self._series.clear()
@@ -5,15 +5,30 @@ from __future__ import annotations
 import asyncio
 import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, Iterator, List,
+    Optional, Sequence, Tuple, Union,
+)
 
 import aiohttp
+import numpy as np
 
 from backend.config.config import (
-    HYPERLIQUID_API, DYDX_API, PRICE_FEED_TIMEOUT_S, TIMEFRAME
+    HYPERLIQUID_API, HYPERLIQUID_WS, DYDX_API, PRICE_FEED_TIMEOUT_S,
+    TIMEFRAME, SUPPORTED_SYMBOLS, STREAMING_FEED, WS_STALE_S,
+    WS_RECONNECT_DELAY_S, CANDLE_CACHE_MAX_BARS,
+    PRICE_HEDGE_PERCENTILE, PRICE_HEDGE_MIN_S, PRICE_HEDGE_DEFAULT_S,
+    HYPERLIQUID_WEIGHTS,
 )
+from backend.utils.http_client import HttpClient
 from backend.utils.logger import get_logger
 from backend.utils.i18n import t
+from backend.utils.rate_limiter import PRIORITY_BACKFILL, PRIORITY_MARKET
+from backend.utils.source_health import SourceHealth
+
+if TYPE_CHECKING:
+    from backend.feeds.candle_archive import CandleArchive
 
 log = get_logger(__name__)
 
@@ -28,6 +43,188 @@ class Candle:
     volume: float
 
 
+class CandleArray:
+    """
+    Columnar candle history. Each field (ts/open/high/low/close/volume) is a
+    contiguous float64 row of one backing buffer, so column access and
+    contiguous slicing are zero-copy views. Appending writes past the end of
+    the buffer and only reallocates on growth. A slice copies its bars on
+    its first write (append, extend, set or insert), so it never modifies
+    the array it came from; writes to that array in place (``set``) do
+    show through slices taken earlier.
+    """
+
+    FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+    def __init__(self, capacity: int = 64) -> None:
+        self._buf = np.empty((len(self.FIELDS), max(capacity, 1)), dtype=np.float64)
+        self._start = 0
+        self._stop = 0
+        self._owner = True
+
+    @classmethod
+    def from_candles(cls, candles: Iterable[Candle]) -> "CandleArray":
+        rows = [(c.ts, c.open, c.high, c.low, c.close, c.volume) for c in candles]
+        arr = cls(capacity=len(rows))
+        if rows:
+            arr._buf[:, :len(rows)] = np.asarray(rows, dtype=np.float64).T
+            arr._stop = len(rows)
+        return arr
+
+    @classmethod
+    def from_columns(cls, **columns: Sequence[float]) -> "CandleArray":
+        n = len(columns["ts"])
+        arr = cls(capacity=n)
+        for i, name in enumerate(cls.FIELDS):
+            arr._buf[i, :n] = columns[name]
+        arr._stop = n
+        return arr
+
+    @classmethod
+    def from_buffer(cls, buf: np.ndarray) -> "CandleArray":
+        """
+        Wrap an existing (6, n) float64 block without copying it. A
+        transposed bar-major block works too; its columns are then strided.
+        """
+        if buf.shape[0] != len(cls.FIELDS) or buf.dtype != np.float64:
+            raise ValueError("CandleArray buffer must be float64 of shape (6, n)")
+        arr = cls.__new__(cls)
+        arr._buf = buf
+        arr._start = 0
+        arr._stop = buf.shape[1]
+        arr._owner = False
+        return arr
+
+    def to_buffer(self) -> np.ndarray:
+        return self._buf[:, self._start:self._stop]
+
+    def _view(self, start: int, stop: int) -> "CandleArray":
+        view = CandleArray.__new__(CandleArray)
+        view._buf = self._buf
+        view._start = start
+        view._stop = stop
+        view._owner = False
+        return view
+
+    def _col(self, i: int) -> np.ndarray:
+        return self._buf[i, self._start:self._stop]
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self._col(0)
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._col(1)
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._col(2)
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._col(3)
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._col(4)
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._col(5)
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __iter__(self) -> Iterator[Candle]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Candle, "CandleArray"]:
+        n = len(self)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(n)
+            if step == 1:
+                return self._view(self._start + start, self._start + max(start, stop))
+            idx = np.arange(start, stop, step) + self._start
+            arr = CandleArray(capacity=len(idx))
+            arr._buf[:, :len(idx)] = self._buf[:, idx]
+            arr._stop = len(idx)
+            return arr
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError("CandleArray index out of range")
+        return Candle(*(float(v) for v in self._buf[:, self._start + key]))
+
+    def __repr__(self) -> str:
+        return f"CandleArray(len={len(self)})"
+
+    def _reserve(self, extra: int) -> None:
+        n = len(self)
+        if self._owner and self._stop + extra <= self._buf.shape[1]:
+            return
+        buf = np.empty((len(self.FIELDS), max(2 * n, n + extra, 64)), dtype=np.float64)
+        buf[:, :n] = self._buf[:, self._start:self._stop]
+        self._buf, self._start, self._stop, self._owner = buf, 0, n, True
+
+    def append(self, candle: Candle) -> None:
+        self._reserve(1)
+        self._buf[:, self._stop] = (
+            candle.ts, candle.open, candle.high,
+            candle.low, candle.close, candle.volume,
+        )
+        self._stop += 1
+
+    def extend(self, candles: Union["CandleArray", Iterable[Candle]]) -> None:
+        if not isinstance(candles, CandleArray):
+            candles = CandleArray.from_candles(candles)
+        k = len(candles)
+        self._reserve(k)
+        self._buf[:, self._stop:self._stop + k] = candles._buf[:, candles._start:candles._stop]
+        self._stop += k
+
+    def set(self, i: int, candle: Candle) -> None:
+        """
+        Overwrite bar ``i``. An owning array is written in place; a slice
+        is copied first.
+        """
+        if i < 0:
+            i += len(self)
+        if not self._owner:
+            self._reserve(0)
+        self._buf[:, self._start + i] = (
+            candle.ts, candle.open, candle.high,
+            candle.low, candle.close, candle.volume,
+        )
+
+    def insert(self, i: int, candle: Candle) -> None:
+        row = np.array([[candle.ts], [candle.open], [candle.high],
+                        [candle.low], [candle.close], [candle.volume]])
+        buf = np.concatenate(
+            [self._buf[:, self._start:self._start + i], row,
+             self._buf[:, self._start + i:self._stop]], axis=1
+        )
+        self._buf, self._start, self._stop, self._owner = buf, 0, buf.shape[1], True
+
+    def drop_front(self, k: int) -> None:
+        self._start = min(self._start + k, self._stop)
+
+    def copy(self) -> "CandleArray":
+        arr = CandleArray(capacity=len(self))
+        arr.extend(self)
+        return arr
+
+    def to_candles(self) -> List[Candle]:
+        return list(self)
+
+
+def as_candle_array(candles: Union[CandleArray, Iterable[Candle]]) -> CandleArray:
+    if isinstance(candles, CandleArray):
+        return candles
+    return CandleArray.from_candles(candles)
+
+
 @dataclass
 class Ticker:
     symbol: str
@@ -37,12 +234,32 @@ class Ticker:
     ts: float = 0.0
 
 
+TIMEFRAME_SECONDS = {"15m": 900, "1h": 3600, "4h": 14400, "1d": 86400}
+
 COINGECKO_IDS = {
     "BTC": "bitcoin", "ETH": "ethereum",
     "SOL": "solana", "ARB": "arbitrum",
 }
 
 
+COINGECKO_API = "https://api.coingecko.com/api/v3"
+
+# Rate-limit bucket each source's requests are charged to.
+SOURCE_URLS = {
+    "hyperliquid": f"{HYPERLIQUID_API}/info",
+    "dydx": DYDX_API,
+    "coingecko": COINGECKO_API,
+}
+
+# Health is tracked per source and endpoint: a venue's candle history can
+# be slow or down while its tickers are fine.
+PRICE_ENDPOINTS = (
+    ("hyperliquid", "tickers"), ("hyperliquid", "candles"),
+    ("dydx", "tickers"), ("dydx", "candles"),
+    ("coingecko", "tickers"),
+)
+
+
 def _hl_symbol(symbol: str) -> str:
     return symbol.split("-")[0]
 
@@ -50,77 +267,495 @@ def _dydx_symbol(symbol: str) -> str:
     return f"{symbol.split('-')[0]}-USD"
 
 
+TickerListener = Callable[[Ticker], Awaitable[None]]
+
+
+class CandleStore:
+    """Per-symbol, per-timeframe candle history merged by bar timestamp."""
+
+    def __init__(self, max_bars: int = CANDLE_CACHE_MAX_BARS) -> None:
+        self.max_bars = max_bars
+        self._bars: Dict[Tuple[str, str], CandleArray] = {}
+
+    def get(self, symbol: str, timeframe: str) -> CandleArray:
+        bars = self._bars.get((symbol, timeframe))
+        return bars[:] if bars is not None else CandleArray()
+
+    def last_ts(self, symbol: str, timeframe: str) -> Optional[float]:
+        bars = self._bars.get((symbol, timeframe))
+        return float(bars.ts[-1]) if bars else None
+
+    def seed(self, symbol: str, timeframe: str, bars: CandleArray) -> None:
+        """Replace the history with a copy of ``bars`` (sorted by ts)."""
+        self._bars[(symbol, timeframe)] = bars[-self.max_bars:].copy()
+
+    def merge(
+        self, symbol: str, timeframe: str, candles: Iterable[Candle]
+    ) -> CandleArray:
+        bars = self._bars.setdefault((symbol, timeframe), CandleArray())
+        for c in sorted(candles, key=lambda c: c.ts):
+            if not bars or c.ts > bars.ts[-1]:
+                bars.append(c)
+                continue
+            i = int(np.searchsorted(bars.ts, c.ts))
+            if bars.ts[i] == c.ts:
+                bars.set(i, c)
+            else:
+                bars.insert(i, c)
+        if len(bars) > self.max_bars:
+            bars.drop_front(len(bars) - self.max_bars)
+        return bars[:]
+
+    def clear(self, symbol: Optional[str] = None) -> None:
+        if symbol is None:
+            self._bars.clear()
+            return
+        for key in [k for k in self._bars if k[0] == symbol]:
+            del self._bars[key]
+
+
 class PriceFeed:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        streaming: bool = STREAMING_FEED,
+        symbols: Optional[List[str]] = None,
+        http: Optional[HttpClient] = None,
+        archive: Optional["CandleArchive"] = None,
+    ) -> None:
+        self._http = http
+        self.archive = archive
+        self._owns_http = http is None
         self._session: Optional[aiohttp.ClientSession] = None
         self._cache: Dict[str, Ticker] = {}
+        self.streaming = streaming
+        self._symbols: List[str] = list(symbols or SUPPORTED_SYMBOLS)
+        self._ws_task: Optional[asyncio.Task] = None
+        self._ws_connected: bool = False
+        self._live_tickers: Dict[str, Ticker] = {}
+        self._live_candles: Dict[str, Candle] = {}
+        self._listeners: List[TickerListener] = []
+        # Latest unseen ticker per symbol, handed to listeners by _dispatch.
+        self._pending_ticks: Dict[str, Ticker] = {}
+        self._tick_ready = asyncio.Event()
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self.candles = CandleStore()
+        self.health: Dict[str, SourceHealth] = {
+            f"{source}:{endpoint}": SourceHealth(f"{source}:{endpoint}")
+            for source, endpoint in PRICE_ENDPOINTS
+        }
 
     async def start(self) -> None:
-        timeout = aiohttp.ClientTimeout(total=PRICE_FEED_TIMEOUT_S)
-        self._session = aiohttp.ClientSession(timeout=timeout)
+        if self._http is None:
+            self._http = HttpClient()
+        self._session = self._http.session(PRICE_FEED_TIMEOUT_S)
         log.info("PriceFeed session opened")
+        if self.streaming:
+            self._ws_task = asyncio.create_task(self._run_stream())
+            self._dispatch_task = asyncio.create_task(self._dispatch())
 
     async def stop(self) -> None:
+        for task in (self._ws_task, self._dispatch_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._ws_task = self._dispatch_task = None
         if self._session:
             await self._session.close()
+        if self._owns_http and self._http is not None:
+            await self._http.close()
         log.info("PriceFeed session closed")
 
+    def add_listener(self, listener: TickerListener) -> None:
+        """
+        Call ``listener`` with streamed tickers. Listeners run in their own
+        task, so a slow one delays only later ticks, never the stream; ticks
+        that arrive meanwhile are coalesced to the latest per symbol.
+        """
+        self._listeners.append(listener)
+
+    @property
+    def stream_connected(self) -> bool:
+        return self._ws_connected
+
+    def _live_ticker(self, symbol: str) -> Optional[Ticker]:
+        if not self._ws_connected:
+            return None
+        ticker = self._live_tickers.get(symbol)
+        if ticker and time.time() - ticker.ts <= WS_STALE_S:
+            return ticker
+        return None
+
     async def get_ticker(self, symbol: str) -> Optional[Ticker]:
-        ticker = await self._hl_ticker(symbol)
+        ticker = self._live_ticker(symbol)
         if ticker:
-            self._cache[symbol] = ticker
             return ticker
-        log.warning(t("price_feed_fallback"))
-        ticker = await self._dydx_ticker(symbol)
+        source, ticker = await self._hedged("tickers", [
+            ("hyperliquid", lambda: self._hl_ticker(symbol),
+             HYPERLIQUID_WEIGHTS["allMids"]),
+            ("dydx", lambda: self._dydx_ticker(symbol), 1),
+            ("coingecko", lambda: self._coingecko_ticker(symbol), 1),
+        ])
         if ticker:
+            if source != "hyperliquid":
+                log.warning(t("price_feed_fallback"))
             self._cache[symbol] = ticker
             return ticker
-        ticker = await self._coingecko_ticker(symbol)
+        log.error(t("price_feed_error", symbol=symbol))
+        return self._cache.get(symbol)
+
+    async def get_tickers(self, symbols: List[str]) -> Dict[str, Ticker]:
+        """One allMids snapshot for every symbol; fallbacks only for misses."""
+        tickers: Dict[str, Ticker] = {}
+        for symbol in symbols:
+            live = self._live_ticker(symbol)
+            if live:
+                tickers[symbol] = live
+        pending = [s for s in symbols if s not in tickers]
+        source = None
+        if pending:
+            source, polled = await self._hedged("tickers", [
+                ("hyperliquid", lambda: self._hl_tickers(pending),
+                 HYPERLIQUID_WEIGHTS["allMids"]),
+                ("dydx", lambda: self._each(self._dydx_ticker, pending),
+                 len(pending)),
+                ("coingecko", lambda: self._each(self._coingecko_ticker, pending),
+                 len(pending)),
+            ])
+            if polled:
+                if source != "hyperliquid":
+                    log.warning(t("price_feed_fallback"))
+                self._cache.update(polled)
+                tickers.update(polled)
+        missing = [s for s in symbols if s not in tickers]
+        if missing and source == "hyperliquid":
+            # allMids lacked these symbols: ask the other sources for them.
+            log.warning(t("price_feed_fallback"))
+            fallback = await asyncio.gather(
+                *(self._fallback_ticker(s) for s in missing)
+            )
+            for symbol, ticker in zip(missing, fallback):
+                if ticker:
+                    tickers[symbol] = ticker
+        elif missing:
+            # dYdX and CoinGecko were already asked for every pending symbol
+            # this tick; asking again per symbol would only double the load.
+            for symbol in missing:
+                cached = self._cache.get(symbol)
+                if cached:
+                    tickers[symbol] = cached
+                else:
+                    log.error(t("price_feed_error", symbol=symbol))
+        return tickers
+
+    async def _fallback_ticker(self, symbol: str) -> Optional[Ticker]:
+        _, ticker = await self._hedged("tickers", [
+            ("dydx", lambda: self._dydx_ticker(symbol), 1),
+            ("coingecko", lambda: self._coingecko_ticker(symbol), 1),
+        ])
         if ticker:
             self._cache[symbol] = ticker
             return ticker
         log.error(t("price_feed_error", symbol=symbol))
         return self._cache.get(symbol)
 
+    @staticmethod
+    async def _each(
+        fetch: Callable[[str], Awaitable[Optional[Ticker]]], symbols: List[str]
+    ) -> Dict[str, Ticker]:
+        results = await asyncio.gather(*(fetch(s) for s in symbols))
+        return {s: tk for s, tk in zip(symbols, results) if tk}
+
     async def get_candles(
         self, symbol: str, limit: int = 50
-    ) -> List[Candle]:
-        candles = await self._hl_candles(symbol, limit)
-        if candles:
+    ) -> CandleArray:
+        cached = self._cached_candles(symbol)
+        # Refetch from the last cached bar: it may still be forming.
+        start_ms = int(cached.ts[-1] * 1000) if len(cached) >= limit else None
+        # Not hedged: the two venues' bars differ, so dYdX is only asked
+        # when Hyperliquid fails.
+        source, fresh = await self._hedged("candles", [
+            # Hyperliquid adds weight per 60 candles returned.
+            ("hyperliquid", lambda: self._hl_candles(symbol, limit, start_ms),
+             HYPERLIQUID_WEIGHTS["candleSnapshot"] + limit // 60),
+            ("dydx", lambda: self._dydx_candles(symbol, limit), 1),
+        ], hedge=False, priority=PRIORITY_BACKFILL)
+        if source == "hyperliquid":
+            merged = self.candles.merge(symbol, TIMEFRAME, fresh)
+            candles = merged[-limit:]
+            self._archive(symbol, fresh)
+        else:
+            candles = CandleArray.from_candles(fresh or [])
+        return self._merge_live_candle(symbol, candles)
+
+    def _cached_candles(self, symbol: str) -> CandleArray:
+        """In-memory history, loaded from the archive on first use."""
+        cached = self.candles.get(symbol, TIMEFRAME)
+        if cached or self.archive is None:
+            return cached
+        stored = self.archive.tail(symbol, TIMEFRAME, self.candles.max_bars)
+        if not stored:
+            return cached
+        self.candles.seed(symbol, TIMEFRAME, stored)
+        log.info("Loaded %d archived %s bars for %s", len(stored), TIMEFRAME, symbol)
+        return self.candles.get(symbol, TIMEFRAME)
+
+    def _archive(self, symbol: str, candles: List[Candle]) -> None:
+        if self.archive is None:
+            return
+        try:
+            self.archive.append(symbol, TIMEFRAME, candles)
+        except OSError as e:
+            log.warning("Candle archive write failed for %s: %s", symbol, e)
+
+    # ── source health and hedging ────────────────────────────────────────────
+
+    def health_snapshot(self) -> Dict[str, dict]:
+        return {name: h.snapshot() for name, h in self.health.items()}
+
+    async def _timed(
+        self, source: str, key: str, fetch: Callable[[], Awaitable[Any]],
+        weight: float, priority: int, started: Dict[str, float],
+    ) -> Any:
+        # Waiting for rate-limit tokens is our queue, not the source's
+        # latency, so the clock starts once the tokens are granted.
+        await self._http.limiter.acquire(SOURCE_URLS[source], weight, priority)
+        health = self.health[key]
+        started["at"] = time.perf_counter()
+        try:
+            result = await fetch()
+        except Exception as e:
+            log.debug("%s fetch error: %s", key, e)
+            result = None
+        # Cancelled losers are scored by _hedged instead.
+        elapsed = time.perf_counter() - started["at"]
+        if result:
+            health.record_success(elapsed)
+        else:
+            health.record_failure(elapsed)
+        return result
+
+    def _hedge_delay(self, key: str) -> float:
+        p = self.health[key].latency_percentile(PRICE_HEDGE_PERCENTILE)
+        if p is None:
+            p = PRICE_HEDGE_DEFAULT_S
+        return min(max(p, PRICE_HEDGE_MIN_S), PRICE_FEED_TIMEOUT_S)
+
+    async def _hedged(
+        self,
+        endpoint: str,
+        attempts: Sequence[Tuple[str, Callable[[], Awaitable[Any]], float]],
+        hedge: bool = True,
+        priority: int = PRIORITY_MARKET,
+    ) -> Tuple[Optional[str], Any]:
+        """
+        (source, result) of the first non-empty answer among ``attempts``,
+        taken in order, each charged its weight against the source's rate
+        limit at ``priority``. Sources whose ``endpoint`` circuit is open are
+        skipped. The next source starts as soon as the running one fails or,
+        when ``hedge`` is set, outlasts its usual latency percentile; the
+        losers are cancelled. The whole call is bounded by
+        PRICE_FEED_TIMEOUT_S.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + PRICE_FEED_TIMEOUT_S
+        queue = list(attempts)
+        running: Dict[asyncio.Future, Tuple[str, Dict[str, float]]] = {}
+        last: Optional[str] = None
+
+        def launch() -> None:
+            nonlocal last
+            while queue:
+                source, fetch, weight = queue.pop(0)
+                key = f"{source}:{endpoint}"
+                if self.health[key].allow():
+                    started: Dict[str, float] = {}
+                    task = asyncio.ensure_future(self._timed(
+                        source, key, fetch, weight, priority, started
+                    ))
+                    running[task] = (source, started)
+                    last = key
+                    return
+
+        try:
+            launch()
+            while running:
+                timeout = deadline - loop.time()
+                if queue and hedge:
+                    timeout = min(timeout, self._hedge_delay(last))
+                done, _ = await asyncio.wait(
+                    running, timeout=max(timeout, 0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    source, _ = running.pop(task)
+                    result = task.result()
+                    if result:
+                        return source, result
+                if loop.time() >= deadline:
+                    break
+                if queue:
+                    if not done:
+                        log.debug("Hedging %s after %.3fs", last, self._hedge_delay(last))
+                    launch()
+        finally:
+            now = time.perf_counter()
+            for task, (source, started) in running.items():
+                if not task.cancel():
+                    continue  # finished, and already scored by _timed
+                # Outrun by a hedge: count it as a slow failure so a hung
+                # source still trips its breaker. One still queued for
+                # rate-limit tokens never reached the source. Either way a
+                # half-open probe it held must be handed back.
+                key = f"{source}:{endpoint}"
+                health = self.health[key]
+                if "at" in started and now - started["at"] >= self._hedge_delay(key):
+                    health.record_failure(now - started["at"])
+                else:
+                    health.release_probe()
+        return None, None
+
+    def _merge_live_candle(
+        self, symbol: str, candles: CandleArray
+    ) -> CandleArray:
+        live = self._live_candles.get(symbol) if self._ws_connected else None
+        if not live or not candles:
             return candles
-        candles = await self._dydx_candles(symbol, limit)
-        return candles or []
+        if live.ts == candles.ts[-1]:
+            candles.set(-1, live)
+        elif live.ts > candles.ts[-1]:
+            candles.append(live)
+        return candles
+
+    # ── streaming ────────────────────────────────────────────────────────────
+
+    async def _run_stream(self) -> None:
+        while True:
+            try:
+                async with self._session.ws_connect(
+                    HYPERLIQUID_WS, heartbeat=30
+                ) as ws:
+                    await self._subscribe(ws)
+                    self._ws_connected = True
+                    log.info("PriceFeed stream connected (%s)", HYPERLIQUID_WS)
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await self._on_stream_message(msg.json())
+                        elif msg.type in (
+                            aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED
+                        ):
+                            break
+            except asyncio.CancelledError:
+                self._ws_connected = False
+                raise
+            except Exception as e:
+                log.debug("HL stream error: %s", e)
+            if self._ws_connected:
+                log.warning("PriceFeed stream lost — falling back to REST")
+            self._ws_connected = False
+            await asyncio.sleep(WS_RECONNECT_DELAY_S)
+
+    async def _subscribe(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        subs: List[dict] = [{"type": "allMids"}]
+        for symbol in self._symbols:
+            coin = _hl_symbol(symbol)
+            subs.append({"type": "trades", "coin": coin})
+            subs.append({"type": "candle", "coin": coin, "interval": TIMEFRAME})
+        for sub in subs:
+            await ws.send_json({"method": "subscribe", "subscription": sub})
+
+    async def _on_stream_message(self, msg: dict) -> None:
+        channel = msg.get("channel")
+        data = msg.get("data")
+        by_coin = {_hl_symbol(s): s for s in self._symbols}
+        if channel == "allMids":
+            mids = data.get("mids", {})
+            for coin, symbol in by_coin.items():
+                if coin in mids:
+                    await self._on_live_price(symbol, float(mids[coin]))
+        elif channel == "trades":
+            for trade in data or []:
+                symbol = by_coin.get(trade.get("coin"))
+                if symbol:
+                    await self._on_live_price(symbol, float(trade["px"]))
+        elif channel == "candle":
+            symbol = by_coin.get(data.get("s"))
+            if symbol:
+                self._live_candles[symbol] = Candle(
+                    ts=data["t"] / 1000,
+                    open=float(data["o"]),
+                    high=float(data["h"]),
+                    low=float(data["l"]),
+                    close=float(data["c"]),
+                    volume=float(data["v"]),
+                )
+
+    async def _on_live_price(self, symbol: str, price: float) -> None:
+        ticker = Ticker(
+            symbol=symbol, price=price,
+            bid=price * 0.9999, ask=price * 1.0001,
+            ts=time.time()
+        )
+        self._live_tickers[symbol] = ticker
+        self._cache[symbol] = ticker
+        if self._listeners:
+            self._pending_ticks[symbol] = ticker
+            self._tick_ready.set()
+
+    async def _dispatch(self) -> None:
+        while True:
+            await self._tick_ready.wait()
+            self._tick_ready.clear()
+            ticks, self._pending_ticks = self._pending_ticks, {}
+            for ticker in ticks.values():
+                for listener in self._listeners:
+                    try:
+                        await listener(ticker)
+                    except Exception as e:
+                        log.warning("Ticker listener error: %s", e)
 
     async def _hl_ticker(self, symbol: str) -> Optional[Ticker]:
+        return (await self._hl_tickers([symbol])).get(symbol)
+
+    async def _hl_tickers(self, symbols: List[str]) -> Dict[str, Ticker]:
         try:
             async with self._session.post(
                 f"{HYPERLIQUID_API}/info",
                 json={"type": "allMids"},
             ) as r:
                 if r.status != 200:
-                    return None
+                    return {}
                 data = await r.json()
-                coin = _hl_symbol(symbol)
-                price_str = data.get(coin)
-                if not price_str:
-                    return None
-                price = float(price_str)
-                return Ticker(
-                    symbol=symbol, price=price,
-                    bid=price * 0.9999, ask=price * 1.0001,
-                    ts=time.time()
-                )
         except Exception as e:
             log.debug("HL ticker error: %s", e)
-            return None
+            return {}
+        now = time.time()
+        tickers: Dict[str, Ticker] = {}
+        for symbol in symbols:
+            price_str = data.get(_hl_symbol(symbol))
+            if not price_str:
+                continue
+            price = float(price_str)
+            tickers[symbol] = Ticker(
+                symbol=symbol, price=price,
+                bid=price * 0.9999, ask=price * 1.0001,
+                ts=now
+            )
+        return tickers
 
-    async def _hl_candles(self, symbol: str, limit: int) -> List[Candle]:
+    async def _hl_candles(
+        self, symbol: str, limit: int, start_ms: Optional[int] = None
+    ) -> List[Candle]:
         try:
             coin = _hl_symbol(symbol)
             interval_map = {"15m": "15m", "1h": "1h", "4h": "4h", "1d": "1d"}
             interval = interval_map.get(TIMEFRAME, "15m")
             end_ms = int(time.time() * 1000)
-            start_ms = end_ms - limit * 15 * 60 * 1000
+            if start_ms is None:
+                bar_ms = TIMEFRAME_SECONDS.get(interval, 900) * 1000
+                start_ms = end_ms - limit * bar_ms
             async with self._session.post(
                 f"{HYPERLIQUID_API}/info",
                 json={
@@ -154,9 +789,8 @@ class PriceFeed:
     async def _dydx_ticker(self, symbol: str) -> Optional[Ticker]:
         try:
             mkt = _dydx_symbol(symbol)
-            async with self._session.get(
-                f"{DYDX_API}/perpetualMarkets?ticker={mkt}"
-            ) as r:
+            url = f"{DYDX_API}/perpetualMarkets?ticker={mkt}"
+            async with self._session.get(url) as r:
                 if r.status != 200:
                     return None
                 data = await r.json()
@@ -178,16 +812,20 @@ class PriceFeed:
             mkt = _dydx_symbol(symbol)
             res_map = {"15m": "15MINS", "1h": "1HOUR", "1d": "1DAY"}
             resolution = res_map.get(TIMEFRAME, "15MINS")
-            async with self._session.get(
+            url = (
                 f"{DYDX_API}/candles/perpetualMarkets/{mkt}"
                 f"?resolution={resolution}&limit={limit}"
-            ) as r:
+            )
+            async with self._session.get(url) as r:
                 if r.status != 200:
                     return []
                 raw = (await r.json()).get("candles", [])
-                return [
+                # Newest first, timestamped by ISO-8601 startedAt.
+                return sorted((
                     Candle(
-                        ts=time.time(),
+                        ts=datetime.fromisoformat(
+                            c["startedAt"].replace("Z", "+00:00")
+                        ).timestamp(),
                         open=float(c["open"]),
                         high=float(c["high"]),
                         low=float(c["low"]),
@@ -195,7 +833,7 @@ class PriceFeed:
                         volume=float(c["usdVolume"]),
                     )
                     for c in raw
-                ]
+                ), key=lambda c: c.ts)
         except Exception as e:
             log.debug("dYdX candles error: %s", e)
             return []
@@ -205,10 +843,7 @@ class PriceFeed:
         if not coin_id:
             return None
         try:
-            url = (
-                "https://api.coingecko.com/api/v3/simple/price"
-                f"?ids={coin_id}&vs_currencies=usd"
-            )
+            url = f"{COINGECKO_API}/simple/price?ids={coin_id}&vs_currencies=usd"
             async with self._session.get(url) as r:
                 if r.status != 200:
                     return None
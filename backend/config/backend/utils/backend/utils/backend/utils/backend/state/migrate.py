@@ -0,0 +1,79 @@
+"""
+AegisTrade — State Migration
+Imports the JSON state files into the SQLite backend:
+
+    python -m backend.state.migrate [--data-dir data] [--db data/aegis.db]
+
+Reads state.json, trades.json and referrals.json, or journal_state.json,
+journal.jsonl and trades.jsonl when the journal backend wrote them. Source files are only
+read. Trades already in the database are skipped, so re-running is safe.
+"""
+from __future__ import annotations
+import argparse
+import os
+from typing import List, Optional
+
+from backend.config.config import SQLITE_FILE
+from backend.state.storage import (
+    SqliteStateStore, StoredState, _apply_trades, _load_json, _read_jsonl,
+)
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def read_json_state(data_dir: str) -> StoredState:
+    def path(name: str) -> str:
+        return os.path.join(data_dir, name)
+
+    snap = _load_json(path("journal_state.json"), None) or {}
+    if snap or os.path.exists(path("journal.jsonl")):
+        # Journal backend snapshot: fold in what the journal has since.
+        state = snap.get("state")
+        referrals = dict(snap.get("referrals", {}))
+        counted = snap.get("trade_count", 0)
+        for rec in _read_jsonl(path("journal.jsonl")):
+            if rec.get("op") == "state":
+                state = rec["state"]
+                counted = rec.get("trade_count", counted)
+            elif rec.get("op") == "referral":
+                referrals[rec["code"]] = rec["data"]
+        trades = _read_jsonl(path("trades.jsonl"))
+        if state is not None and len(trades) > counted:
+            state = _apply_trades(state, trades[counted:])
+    else:
+        state = _load_json(path("state.json"), None)
+        if isinstance(state, dict) and "state" in state and "trade_count" in state:
+            state = state["state"]
+        referrals = dict(_load_json(path("referrals.json"), {}))
+        trades = _read_jsonl(path("trades.jsonl")) or list(
+            _load_json(path("trades.json"), [])
+        )
+    return StoredState(state=state, trades=trades, referrals=referrals)
+
+
+def migrate(data_dir: str = "data", db_path: str = SQLITE_FILE) -> int:
+    stored = read_json_state(data_dir)
+    store = SqliteStateStore(db_path)
+    try:
+        added = store.import_state(stored)
+    finally:
+        store.close()
+    log.info(
+        "Migrated %s → %s: state=%s, %d/%d new trades, %d referrals",
+        data_dir, db_path, stored.state is not None, added,
+        len(stored.trades), len(stored.referrals),
+    )
+    return added
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import JSON state into SQLite")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--db", default=SQLITE_FILE)
+    args = parser.parse_args(argv)
+    migrate(args.data_dir, args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,24 @@ AegisTrade — State Manager
 """
 from __future__ import annotations
 import asyncio
-import json
 import time
 import uuid
 from dataclasses import dataclass, field, asdict
-from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Union
 
-from backend.config.config import (
-    INITIAL_CAPITAL, STATE_FILE, TRADE_HISTORY_FILE, REFERRAL_FILE
+from backend.config.config import INITIAL_CAPITAL
+from backend.state.storage import (
+    BaseStateStore, MemoryStateStore, TradeQueryStore, create_store,
+    filter_trades,
 )
 from backend.utils.logger import get_logger
 
 log = get_logger(__name__)
 _lock = asyncio.Lock()
 
+TradeListener = Callable[[dict], None]
+PositionListener = Callable[[dict], None]
+
 
 @dataclass
 class Position:
@@ -32,6 +35,8 @@ class Position:
     dex: str
     opened_at: float = field(default_factory=time.time)
     pnl: float = 0.0
+    fee: float = 0.0
+    worst_price: float = 0.0
 
 
 @dataclass
@@ -48,6 +53,9 @@ class TradeRecord:
     opened_at: float
     closed_at: float = field(default_factory=time.time)
     reason: str = ""
+    position_id: str = ""
+    fee: float = 0.0
+    max_adverse_pct: float = 0.0
 
 
 @dataclass
@@ -60,38 +68,93 @@ class BotState:
     positions: Dict[str, dict] = field(default_factory=dict)
     system_locked: bool = False
     trading_halted: bool = False
-    current_regime: str = "neutral"
+    regimes: Dict[str, str] = field(default_factory=dict)
     day_start_balance: float = INITIAL_CAPITAL
     week_start_balance: float = INITIAL_CAPITAL
     last_reset: float = field(default_factory=time.time)
 
 
 class StateManager:
-    def __init__(self) -> None:
-        self._state = BotState()
+    def __init__(
+        self,
+        persist: bool = True,
+        initial_balance: float = INITIAL_CAPITAL,
+        clock: Callable[[], float] = time.time,
+        store: Optional[BaseStateStore] = None,
+    ) -> None:
+        self.persist = persist
+        self._clock = clock
+        if store is None:
+            store = create_store() if persist else MemoryStateStore()
+        self._store = store
+        self._state = BotState(
+            balance=initial_balance,
+            equity=initial_balance,
+            day_start_balance=initial_balance,
+            week_start_balance=initial_balance,
+        )
         self._trades: List[dict] = []
         self._referrals: dict = {}
-        self._ensure_dirs()
+        self._trade_listeners: List[TradeListener] = []
+        self._position_listeners: List[PositionListener] = []
+        self._version = 0
+
+    def now(self) -> float:
+        return self._clock()
+
+    @property
+    def version(self) -> int:
+        """Incremented on every mutation; lets readers cache derived views."""
+        return self._version
+
+    def _bump(self) -> None:
+        self._version += 1
+
+    @property
+    def store(self) -> BaseStateStore:
+        return self._store
 
-    def _ensure_dirs(self) -> None:
-        for f in [STATE_FILE, TRADE_HISTORY_FILE, REFERRAL_FILE]:
-            Path(f).parent.mkdir(parents=True, exist_ok=True)
+    def add_trade_listener(self, listener: TradeListener) -> None:
+        """Called with each TradeRecord dict as its position closes."""
+        self._trade_listeners.append(listener)
+
+    def add_position_listener(self, listener: PositionListener) -> None:
+        """Called with each Position dict as it opens."""
+        self._position_listeners.append(listener)
+
+    @staticmethod
+    def _notify(listeners: list, data: dict) -> None:
+        for listener in listeners:
+            try:
+                listener(data)
+            except Exception as e:
+                log.warning("State listener error: %s", e)
 
     async def load(self) -> None:
+        if not self.persist:
+            return
         async with _lock:
-            self._state = await asyncio.to_thread(self._load_state)
-            self._trades = await asyncio.to_thread(self._load_json, TRADE_HISTORY_FILE, [])
-            self._referrals = await asyncio.to_thread(self._load_json, REFERRAL_FILE, {})
+            stored = await asyncio.to_thread(self._store.load)
+            self._state = self._parse_state(stored.state)
+            self._trades = stored.trades
+            self._referrals = stored.referrals
+            self._bump()
         log.info("State loaded. Balance=%.2f", self._state.balance)
 
     async def save(self) -> None:
         async with _lock:
-            await asyncio.to_thread(self._write_json, STATE_FILE, asdict(self._state))
-            await asyncio.to_thread(self._write_json, TRADE_HISTORY_FILE, self._trades)
-            await asyncio.to_thread(self._write_json, REFERRAL_FILE, self._referrals)
+            await asyncio.to_thread(self._store.save_state, asdict(self._state))
+
+    async def flush(self) -> None:
+        async with _lock:
+            await asyncio.to_thread(self._store.flush)
 
-    def _load_state(self) -> BotState:
-        data = self._load_json(STATE_FILE, None)
+    async def close(self) -> None:
+        async with _lock:
+            await asyncio.to_thread(self._store.close)
+
+    @staticmethod
+    def _parse_state(data: Optional[dict]) -> BotState:
         if data:
             try:
                 return BotState(**{k: v for k, v in data.items()
@@ -100,19 +163,6 @@ class StateManager:
                 log.warning("State parse error: %s — using fresh state", e)
         return BotState()
 
-    @staticmethod
-    def _load_json(path: str, default):
-        try:
-            with open(path) as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return default
-
-    @staticmethod
-    def _write_json(path: str, data) -> None:
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2)
-
     @property
     def balance(self) -> float:
         return self._state.balance
@@ -146,13 +196,31 @@ class StateManager:
         return self._state.trading_halted
 
     @property
-    def current_regime(self) -> str:
-        return self._state.current_regime
+    def regimes(self) -> Dict[str, str]:
+        return dict(self._state.regimes)
+
+    def regime_for(self, symbol: str) -> str:
+        return self._state.regimes.get(symbol, "neutral")
 
     @property
     def trades(self) -> List[dict]:
+        """
+        Trade history held in memory. With a TradeQueryStore backend this is
+        only what closed since load(); use trade_source for reports.
+        """
         return self._trades
 
+    @property
+    def trade_source(self) -> Union[List[dict], TradeQueryStore]:
+        if isinstance(self._store, TradeQueryStore):
+            return self._store
+        return self._trades
+
+    def recent_trades(self, limit: int = 50, **filters) -> List[dict]:
+        if isinstance(self._store, TradeQueryStore):
+            return self._store.query_trades(limit=limit, **filters)
+        return filter_trades(self._trades, **filters)[-limit:]
+
     @property
     def referrals(self) -> dict:
         return self._referrals
@@ -164,23 +232,46 @@ class StateManager:
         }
 
     async def open_position(self, pos: Position) -> None:
+        data = asdict(pos)
         async with _lock:
-            self._state.positions[pos.id] = asdict(pos)
+            self._state.positions[pos.id] = data
+            self._bump()
         await self.save()
+        self._notify(self._position_listeners, data)
+
+    def mark_price(self, position_id: str, price: float) -> None:
+        """
+        Track the worst price seen against an open position (in memory).
+        Called on every price, so it does not bump the state version.
+        """
+        pos = self._state.positions.get(position_id)
+        if pos is None:
+            return
+        worst = pos.get("worst_price") or pos["entry_price"]
+        if pos["side"] == "long":
+            pos["worst_price"] = min(worst, price)
+        else:
+            pos["worst_price"] = max(worst, price)
 
     async def close_position(
         self, position_id: str, exit_price: float, reason: str = ""
     ) -> Optional[TradeRecord]:
         async with _lock:
             pos_data = self._state.positions.pop(position_id, None)
+            if pos_data:
+                self._bump()
         if not pos_data:
             log.warning("close_position: unknown id %s", position_id)
             return None
         pos = Position(**pos_data)
+        worst = pos.worst_price or pos.entry_price
         if pos.side == "long":
             pnl = (exit_price - pos.entry_price) * pos.qty
+            adverse = pos.entry_price - min(worst, exit_price)
         else:
             pnl = (pos.entry_price - exit_price) * pos.qty
+            adverse = max(worst, exit_price) - pos.entry_price
+        adverse_pct = max(adverse, 0.0) / pos.entry_price if pos.entry_price else 0.0
         record = TradeRecord(
             id=str(uuid.uuid4()),
             symbol=pos.symbol,
@@ -192,48 +283,65 @@ class StateManager:
             strategy=pos.strategy,
             dex=pos.dex,
             opened_at=pos.opened_at,
+            closed_at=self._clock(),
             reason=reason,
+            position_id=pos.id,
+            fee=pos.fee,
+            max_adverse_pct=adverse_pct,
         )
+        trade = asdict(record)
         async with _lock:
             self._state.balance += pnl
             self._state.equity = self._state.balance
             self._state.daily_pnl += pnl
             self._state.weekly_pnl += pnl
             self._state.total_pnl += pnl
-            self._trades.append(asdict(record))
-        await self.save()
+            self._trades.append(trade)
+            await asyncio.to_thread(
+                self._store.append_trade, trade, asdict(self._state)
+            )
+        self._notify(self._trade_listeners, trade)
+        # After the listeners, so views built on PnL trackers see the trade.
+        self._bump()
         return record
 
-    async def update_regime(self, regime: str) -> None:
+    async def update_regime(self, symbol: str, regime: str) -> None:
         async with _lock:
-            self._state.current_regime = regime
+            if regime != self._state.regimes.get(symbol):
+                self._state.regimes[symbol] = regime
+                self._bump()
 
     async def set_halted(self, halted: bool) -> None:
         async with _lock:
             self._state.trading_halted = halted
+            self._bump()
         await self.save()
 
     async def set_locked(self, locked: bool) -> None:
         async with _lock:
             self._state.system_locked = locked
+            self._bump()
         await self.save()
 
     async def daily_reset(self) -> None:
         async with _lock:
             self._state.day_start_balance = self._state.balance
             self._state.daily_pnl = 0.0
+            self._bump()
         await self.save()
 
     async def weekly_reset(self) -> None:
         async with _lock:
             self._state.week_start_balance = self._state.balance
             self._state.weekly_pnl = 0.0
+            self._bump()
         await self.save()
 
     async def add_referral(self, code: str, data: dict) -> None:
         async with _lock:
             self._referrals[code] = data
-        await self.save()
+            self._bump()
+            await asyncio.to_thread(self._store.put_referral, code, data)
 
     def get_referral(self, code: str) -> Optional[dict]:
         return self._referrals.get(code)
@@ -0,0 +1,724 @@
+"""
+AegisTrade — State Storage
+Pluggable persistence backends for StateManager.
+"""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+from backend.config.config import (
+    STATE_FILE, TRADE_HISTORY_FILE, REFERRAL_FILE, STATE_BACKEND,
+    TRADE_JOURNAL_FILE, STATE_JOURNAL_FILE, JOURNAL_SNAPSHOT_FILE,
+    JOURNAL_COMPACT_EVERY,
+    SQLITE_FILE, SQLITE_COMMIT_EVERY, SQLITE_COMMIT_INTERVAL_S,
+)
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+@dataclass
+class StoredState:
+    state: Optional[dict] = None
+    trades: List[dict] = field(default_factory=list)
+    referrals: dict = field(default_factory=dict)
+
+
+def _load_json(path: str, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def _write_json(path: str, data, indent: Optional[int] = 2) -> None:
+    with open(path, "w") as f:
+        json.dump(data, f, indent=indent)
+
+
+def _write_json_atomic(path: str, data) -> None:
+    tmp = f"{path}.tmp"
+    _write_json(tmp, data, indent=None)
+    os.replace(tmp, path)
+
+
+def _read_jsonl(path: str) -> List[dict]:
+    records: List[dict] = []
+    try:
+        with open(path) as f:
+            for n, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line after a crash is expected; skip it.
+                    log.warning("Skipping corrupt journal line %s:%d", path, n)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _truncate_torn_tail(path: str) -> None:
+    """Drop a partial last line so the next append starts on a fresh line."""
+    try:
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+                log.warning("Truncated torn record at end of %s", path)
+    except FileNotFoundError:
+        pass
+
+
+def _ensure_parent(*paths: str) -> None:
+    for p in paths:
+        Path(p).parent.mkdir(parents=True, exist_ok=True)
+
+
+def filter_trades(
+    trades: List[dict],
+    symbol: Optional[str] = None,
+    strategy: Optional[str] = None,
+    dex: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+) -> List[dict]:
+    """In-memory equivalent of the filters TradeQueryStore accepts."""
+    out = trades
+    if symbol is not None:
+        out = [t for t in out if t["symbol"] == symbol]
+    if strategy is not None:
+        out = [t for t in out if t["strategy"] == strategy]
+    if dex is not None:
+        out = [t for t in out if t.get("dex") == dex]
+    if since is not None:
+        out = [t for t in out if t["closed_at"] >= since]
+    if until is not None:
+        out = [t for t in out if t["closed_at"] < until]
+    return out
+
+
+class BaseStateStore(ABC):
+    name: str = "base"
+
+    @abstractmethod
+    def load(self) -> StoredState: ...
+
+    @abstractmethod
+    def save_state(self, state: dict) -> None: ...
+
+    @abstractmethod
+    def append_trade(self, trade: dict, state: dict) -> None: ...
+
+    @abstractmethod
+    def put_referral(self, code: str, data: dict) -> None: ...
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TradeQueryStore(ABC):
+    """
+    A store that can filter and aggregate trade history itself, so callers
+    do not need the whole history in memory. Filters: ``symbol``,
+    ``strategy``, ``dex`` and ``since``/``until`` on ``closed_at``.
+    """
+
+    @abstractmethod
+    def trade_stats(
+        self,
+        starting_balance: float,
+        group_by: Optional[str] = None,
+        **filters: Any,
+    ) -> Dict[Optional[str], dict]:
+        """Per-group aggregates in the shape of ``PnLEngine.trade_stats``."""
+
+    @abstractmethod
+    def query_trades(self, limit: Optional[int] = None, **filters: Any) -> List[dict]:
+        """Matching trades in close order; ``limit`` keeps the most recent."""
+
+    @abstractmethod
+    def trade_rollups(self, bucket_s: int, offset_s: int = 0) -> List[dict]:
+        """Rows in the shape of ``PnLRollup`` buckets, for seeding it."""
+
+
+class MemoryStateStore(BaseStateStore):
+    """Keeps nothing; used by backtests and other throwaway states."""
+
+    name = "memory"
+
+    def load(self) -> StoredState:
+        return StoredState()
+
+    def save_state(self, state: dict) -> None:
+        pass
+
+    def append_trade(self, trade: dict, state: dict) -> None:
+        pass
+
+    def put_referral(self, code: str, data: dict) -> None:
+        pass
+
+
+class JsonStateStore(BaseStateStore):
+    """Original layout: each file is rewritten in full when it changes."""
+
+    name = "json"
+
+    def __init__(
+        self,
+        state_file: str = STATE_FILE,
+        trades_file: str = TRADE_HISTORY_FILE,
+        referral_file: str = REFERRAL_FILE,
+    ) -> None:
+        self.state_file = state_file
+        self.trades_file = trades_file
+        self.referral_file = referral_file
+        self._trades: List[dict] = []
+        self._referrals: dict = {}
+        _ensure_parent(state_file, trades_file, referral_file)
+
+    def load(self) -> StoredState:
+        self._trades = list(_load_json(self.trades_file, []))
+        self._referrals = dict(_load_json(self.referral_file, {}))
+        state = _load_json(self.state_file, None)
+        if isinstance(state, dict) and "state" in state and "trade_count" in state:
+            # Written by an older journal backend that shared this file.
+            self._referrals = self._referrals or dict(state.get("referrals", {}))
+            state = state["state"]
+        return StoredState(
+            state=state,
+            trades=list(self._trades),
+            referrals=dict(self._referrals),
+        )
+
+    def save_state(self, state: dict) -> None:
+        _write_json(self.state_file, state)
+
+    def append_trade(self, trade: dict, state: dict) -> None:
+        self._trades.append(trade)
+        _write_json(self.trades_file, self._trades)
+        self.save_state(state)
+
+    def put_referral(self, code: str, data: dict) -> None:
+        self._referrals[code] = data
+        _write_json(self.referral_file, self._referrals)
+
+
+def _apply_trades(state: dict, trades: List[dict]) -> dict:
+    """Fold closed trades the snapshot has not seen yet into BotState."""
+    state = dict(state)
+    positions = dict(state.get("positions", {}))
+    for t in trades:
+        pnl = t.get("pnl", 0.0)
+        for key in ("balance", "daily_pnl", "weekly_pnl", "total_pnl"):
+            state[key] = state.get(key, 0.0) + pnl
+        state["equity"] = state["balance"]
+        positions.pop(t.get("position_id", ""), None)
+    state["positions"] = positions
+    return state
+
+
+class JournalStateStore(BaseStateStore):
+    """
+    Append-only persistence. Closed trades are appended to a JSONL trade
+    history; BotState and referral changes are appended to a state journal
+    that is folded into a snapshot every ``compact_every`` records. Every
+    write is O(1) in the length of the trade history.
+
+    The JSON backend's files are only read, to import them on first start;
+    the journal never writes to them.
+    """
+
+    name = "journal"
+
+    def __init__(
+        self,
+        snapshot_file: str = JOURNAL_SNAPSHOT_FILE,
+        journal_file: str = STATE_JOURNAL_FILE,
+        trades_file: str = TRADE_JOURNAL_FILE,
+        compact_every: int = JOURNAL_COMPACT_EVERY,
+        legacy_state_file: str = STATE_FILE,
+        legacy_trades_file: str = TRADE_HISTORY_FILE,
+        legacy_referral_file: str = REFERRAL_FILE,
+    ) -> None:
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self.trades_file = trades_file
+        self.compact_every = compact_every
+        self.legacy_state_file = legacy_state_file
+        self.legacy_trades_file = legacy_trades_file
+        self.legacy_referral_file = legacy_referral_file
+        self._state: Optional[dict] = None
+        self._referrals: dict = {}
+        self._trade_count = 0
+        self._journal_records = 0
+        self._journal: Optional[TextIO] = None
+        self._trades: Optional[TextIO] = None
+        _ensure_parent(snapshot_file, journal_file, trades_file)
+
+    def load(self) -> StoredState:
+        self.close()
+        snap = _load_json(self.snapshot_file, None) or {}
+        legacy = not snap and not os.path.exists(self.journal_file)
+        if legacy:
+            # First start: import the JSON backend's files, if any.
+            state = _load_json(self.legacy_state_file, None)
+            referrals = dict(_load_json(self.legacy_referral_file, {}))
+            counted = None
+        else:
+            state = snap.get("state")
+            referrals = dict(snap.get("referrals", {}))
+            counted = snap.get("trade_count", 0)
+
+        journal = _read_jsonl(self.journal_file)
+        for rec in journal:
+            op = rec.get("op")
+            if op == "state":
+                state = rec["state"]
+                counted = rec.get("trade_count", counted)
+            elif op == "referral":
+                referrals[rec["code"]] = rec["data"]
+
+        trades = _read_jsonl(self.trades_file)
+        imported = False
+        if not trades and not os.path.exists(self.trades_file):
+            trades = list(_load_json(self.legacy_trades_file, []))
+            if trades:
+                with open(self.trades_file, "w") as f:
+                    f.writelines(json.dumps(t) + "\n" for t in trades)
+                log.info("Imported %d trades from %s", len(trades), self.legacy_trades_file)
+                imported = True
+        if counted is None:
+            counted = len(trades)
+
+        if state is not None and len(trades) > counted:
+            log.info("Replaying %d journaled trades into state", len(trades) - counted)
+            state = _apply_trades(state, trades[counted:])
+
+        _truncate_torn_tail(self.journal_file)
+        _truncate_torn_tail(self.trades_file)
+        self._state = state
+        self._referrals = referrals
+        self._trade_count = len(trades)
+        self._journal_records = len(journal)
+        self._open()
+        imported = imported or legacy and (state is not None or bool(referrals))
+        if imported or len(trades) != counted:
+            self.compact()
+        return StoredState(state=state, trades=trades, referrals=dict(referrals))
+
+    def _open(self) -> None:
+        if self._journal is None:
+            self._journal = open(self.journal_file, "a")
+        if self._trades is None:
+            self._trades = open(self.trades_file, "a")
+
+    def _append(self, record: dict) -> None:
+        self._open()
+        self._journal.write(json.dumps(record) + "\n")
+        self._journal.flush()
+        self._journal_records += 1
+        if self._journal_records >= self.compact_every:
+            self.compact()
+
+    def save_state(self, state: dict) -> None:
+        self._state = state
+        self._append({"op": "state", "state": state, "trade_count": self._trade_count})
+
+    def append_trade(self, trade: dict, state: dict) -> None:
+        self._open()
+        self._trades.write(json.dumps(trade) + "\n")
+        self._trades.flush()
+        self._trade_count += 1
+        self.save_state(state)
+
+    def put_referral(self, code: str, data: dict) -> None:
+        self._referrals[code] = data
+        self._append({"op": "referral", "code": code, "data": data})
+
+    def compact(self) -> None:
+        _write_json_atomic(self.snapshot_file, {
+            "state": self._state,
+            "referrals": self._referrals,
+            "trade_count": self._trade_count,
+        })
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_file, "w")
+        self._journal_records = 0
+        log.debug("State journal compacted (%d trades)", self._trade_count)
+
+    def close(self) -> None:
+        for fh in (self._journal, self._trades):
+            if fh is not None:
+                fh.close()
+        self._journal = None
+        self._trades = None
+
+
+TRADE_COLUMNS = (
+    "id", "symbol", "side", "qty", "entry_price", "exit_price", "pnl",
+    "strategy", "dex", "opened_at", "closed_at", "reason", "position_id",
+    "fee", "max_adverse_pct",
+)
+TRADE_GROUPS = ("symbol", "strategy", "dex", "side")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bot_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    id TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE,
+    symbol TEXT,
+    side TEXT,
+    qty REAL,
+    entry_price REAL,
+    exit_price REAL,
+    pnl REAL NOT NULL,
+    strategy TEXT,
+    dex TEXT,
+    opened_at REAL,
+    closed_at REAL,
+    reason TEXT,
+    position_id TEXT,
+    fee REAL DEFAULT 0,
+    max_adverse_pct REAL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_trades_symbol ON trades(symbol);
+CREATE INDEX IF NOT EXISTS idx_trades_strategy ON trades(strategy);
+CREATE INDEX IF NOT EXISTS idx_trades_closed_at ON trades(closed_at);
+CREATE TABLE IF NOT EXISTS referrals (
+    code TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+# Running equity, per-trade return and drawdown per group, then one row of
+# aggregates per group. Sums run in close order (seq) so they accumulate
+# exactly like PnLEngine.trade_stats does over a list.
+_STATS_SQL = """
+WITH t AS (
+    SELECT seq, pnl, {group} AS g FROM trades {where}
+),
+e AS (
+    SELECT seq, g, pnl,
+           :start + SUM(pnl) OVER (
+               PARTITION BY g ORDER BY seq ROWS UNBOUNDED PRECEDING
+           ) AS equity,
+           :start + COALESCE(SUM(pnl) OVER (
+               PARTITION BY g ORDER BY seq
+               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+           ), 0.0) AS prev_equity
+    FROM t
+),
+r AS (
+    SELECT seq, g, pnl, equity,
+           CASE WHEN prev_equity != 0 THEN pnl / prev_equity ELSE 0.0 END AS ret,
+           MAX(:start, MAX(equity) OVER (
+               PARTITION BY g ORDER BY seq ROWS UNBOUNDED PRECEDING
+           )) AS peak
+    FROM e
+),
+agg AS (
+    SELECT g,
+           COUNT(*) AS n,
+           SUM(pnl) AS total_pnl,
+           SUM(pnl > 0) AS wins,
+           TOTAL(CASE WHEN pnl > 0 THEN pnl END) AS gross_profit,
+           TOTAL(CASE WHEN pnl < 0 THEN pnl END) AS gross_loss,
+           MAX(CASE WHEN peak > 0 THEN (peak - equity) / peak ELSE 0.0 END) AS max_drawdown,
+           MAX(peak) AS peak_equity,
+           SUM(ret) / COUNT(*) AS mean_return
+    FROM r GROUP BY g
+)
+SELECT agg.*, TOTAL((r.ret - agg.mean_return) * (r.ret - agg.mean_return)) AS ss_return
+FROM agg JOIN r ON r.g IS agg.g
+GROUP BY agg.g
+"""
+
+
+def _trade_filters(
+    symbol: Optional[str] = None,
+    strategy: Optional[str] = None,
+    dex: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+) -> tuple:
+    clauses: List[str] = []
+    params: Dict[str, Any] = {}
+    for col, val in (("symbol", symbol), ("strategy", strategy), ("dex", dex)):
+        if val is not None:
+            clauses.append(f"{col} = :{col}")
+            params[col] = val
+    if since is not None:
+        clauses.append("closed_at >= :since")
+        params["since"] = since
+    if until is not None:
+        clauses.append("closed_at < :until")
+        params["until"] = until
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class SqliteStateStore(BaseStateStore, TradeQueryStore):
+    """
+    SQLite persistence in WAL mode. Writes accumulate in one transaction
+    that is committed every ``commit_every`` writes, after
+    ``commit_interval_s`` or on ``flush()``/``close()``. Trade history stays
+    on disk: ``load()`` does not return it, and reports are computed with
+    ``trade_stats``/``query_trades``.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str = SQLITE_FILE,
+        commit_every: int = SQLITE_COMMIT_EVERY,
+        commit_interval_s: float = SQLITE_COMMIT_INTERVAL_S,
+    ) -> None:
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval_s = commit_interval_s
+        self._db: Optional[sqlite3.Connection] = None
+        self._mutex = threading.RLock()
+        self._pending = 0
+        self._first_pending = 0.0
+        self._positions: Dict[str, str] = {}
+        if path != ":memory:":
+            _ensure_parent(path)
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            # StateManager calls in from worker threads; _mutex serialises use.
+            self._db = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+            self._add_missing_columns()
+        return self._db
+
+    def _add_missing_columns(self) -> None:
+        have = {r["name"] for r in self._db.execute("PRAGMA table_info(trades)")}
+        for col in TRADE_COLUMNS:
+            if col not in have:
+                kind = "TEXT" if col in ("reason", "position_id") else "REAL DEFAULT 0"
+                self._db.execute(f"ALTER TABLE trades ADD COLUMN {col} {kind}")
+
+    # ── writes ──
+
+    def _write(self, sql: str, params: Any = ()) -> None:
+        db = self.db
+        if not db.in_transaction:
+            db.execute("BEGIN")
+            self._first_pending = time.monotonic()
+        db.execute(sql, params)
+        self._pending += 1
+
+    def _maybe_commit(self) -> None:
+        if self._pending >= self.commit_every or (
+            self._pending
+            and time.monotonic() - self._first_pending >= self.commit_interval_s
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        with self._mutex:
+            if self._db is not None and self._db.in_transaction:
+                self._db.execute("COMMIT")
+            self._pending = 0
+
+    def _save_state(self, state: dict) -> None:
+        state = dict(state)
+        positions = state.pop("positions", {}) or {}
+        self._write(
+            "INSERT OR REPLACE INTO bot_state (id, data) VALUES (1, ?)",
+            (json.dumps(state),),
+        )
+        for pid in set(self._positions) - set(positions):
+            self._write("DELETE FROM positions WHERE id = ?", (pid,))
+            del self._positions[pid]
+        for pid, pos in positions.items():
+            data = json.dumps(pos)
+            if self._positions.get(pid) != data:
+                self._write(
+                    "INSERT OR REPLACE INTO positions (id, symbol, data) VALUES (?, ?, ?)",
+                    (pid, pos.get("symbol", ""), data),
+                )
+                self._positions[pid] = data
+
+    def _insert_trades(self, trades: List[dict]) -> None:
+        placeholders = ", ".join("?" * len(TRADE_COLUMNS))
+        sql = (
+            f"INSERT OR IGNORE INTO trades ({', '.join(TRADE_COLUMNS)}) "
+            f"VALUES ({placeholders})"
+        )
+        for t in trades:
+            self._write(sql, tuple(t.get(c) for c in TRADE_COLUMNS))
+
+    def save_state(self, state: dict) -> None:
+        with self._mutex:
+            self._save_state(state)
+            self._maybe_commit()
+
+    def append_trade(self, trade: dict, state: dict) -> None:
+        with self._mutex:
+            self._insert_trades([trade])
+            self._save_state(state)
+            # A closed trade is committed at once, not batched.
+            self.flush()
+
+    def put_referral(self, code: str, data: dict) -> None:
+        with self._mutex:
+            self._write(
+                "INSERT OR REPLACE INTO referrals (code, data) VALUES (?, ?)",
+                (code, json.dumps(data)),
+            )
+            self._maybe_commit()
+
+    def import_state(self, stored: StoredState) -> int:
+        """Bulk-load a StoredState (used by the migration tool)."""
+        with self._mutex:
+            before = self.trade_count()
+            if stored.state is not None:
+                self._save_state(stored.state)
+            self._insert_trades(stored.trades)
+            for code, data in stored.referrals.items():
+                self._write(
+                    "INSERT OR REPLACE INTO referrals (code, data) VALUES (?, ?)",
+                    (code, json.dumps(data)),
+                )
+            self.flush()
+            return self.trade_count() - before
+
+    # ── reads ──
+
+    def load(self) -> StoredState:
+        with self._mutex:
+            row = self.db.execute("SELECT data FROM bot_state WHERE id = 1").fetchone()
+            state = json.loads(row["data"]) if row else None
+            self._positions = {
+                r["id"]: r["data"]
+                for r in self.db.execute("SELECT id, data FROM positions")
+            }
+            if state is not None:
+                state["positions"] = {
+                    pid: json.loads(data) for pid, data in self._positions.items()
+                }
+            referrals = {
+                r["code"]: json.loads(r["data"])
+                for r in self.db.execute("SELECT code, data FROM referrals")
+            }
+        return StoredState(state=state, trades=[], referrals=referrals)
+
+    def trade_count(self, **filters: Any) -> int:
+        where, params = _trade_filters(**filters)
+        with self._mutex:
+            return self.db.execute(
+                f"SELECT COUNT(*) FROM trades {where}", params
+            ).fetchone()[0]
+
+    def query_trades(self, limit: Optional[int] = None, **filters: Any) -> List[dict]:
+        where, params = _trade_filters(**filters)
+        sql = f"SELECT {', '.join(TRADE_COLUMNS)} FROM trades {where} ORDER BY seq DESC"
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+        with self._mutex:
+            rows = self.db.execute(sql, params).fetchall()
+        return [dict(r) for r in reversed(rows)]
+
+    def trade_stats(
+        self,
+        starting_balance: float,
+        group_by: Optional[str] = None,
+        **filters: Any,
+    ) -> Dict[Optional[str], dict]:
+        if group_by is not None and group_by not in TRADE_GROUPS:
+            raise ValueError(f"Cannot group trades by {group_by!r}")
+        where, params = _trade_filters(**filters)
+        params["start"] = starting_balance
+        sql = _STATS_SQL.format(group=group_by or "NULL", where=where)
+        with self._mutex:
+            rows = self.db.execute(sql, params).fetchall()
+        return {
+            r["g"]: {
+                "count": r["n"],
+                "total_pnl": r["total_pnl"],
+                "wins": r["wins"],
+                "gross_profit": r["gross_profit"],
+                "gross_loss": r["gross_loss"],
+                "max_drawdown": r["max_drawdown"],
+                "peak_equity": r["peak_equity"],
+                "mean_return": r["mean_return"],
+                "ss_return": r["ss_return"],
+            }
+            for r in rows
+        }
+
+    def trade_rollups(self, bucket_s: int, offset_s: int = 0) -> List[dict]:
+        """Per-bucket aggregates keyed by bucket start, symbol, strategy and dex."""
+        sql = """
+            SELECT CAST((closed_at - :offset) / :size AS INTEGER) * :size + :offset
+                       AS bucket,
+                   symbol, strategy, dex,
+                   COUNT(*) AS count,
+                   SUM(pnl > 0) AS wins,
+                   TOTAL(pnl) AS pnl,
+                   TOTAL(CASE WHEN pnl > 0 THEN pnl END) AS gross_profit,
+                   TOTAL(CASE WHEN pnl < 0 THEN pnl END) AS gross_loss,
+                   TOTAL(fee) AS fees,
+                   MAX(COALESCE(max_adverse_pct, 0)) AS max_adverse_pct
+            FROM trades
+            GROUP BY bucket, symbol, strategy, dex
+            ORDER BY bucket
+        """
+        with self._mutex:
+            rows = self.db.execute(sql, {"size": bucket_s, "offset": offset_s})
+            return [dict(r) for r in rows]
+
+    def close(self) -> None:
+        with self._mutex:
+            if self._db is not None:
+                self.flush()
+                self._db.close()
+                self._db = None
+
+
+STORE_MAP: Dict[str, type] = {
+    "json": JsonStateStore,
+    "journal": JournalStateStore,
+    "sqlite": SqliteStateStore,
+    "memory": MemoryStateStore,
+}
+
+
+def create_store(name: str = STATE_BACKEND) -> BaseStateStore:
+    cls = STORE_MAP.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown state backend: {name}")
+    return cls()
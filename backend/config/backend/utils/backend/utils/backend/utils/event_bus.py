@@ -0,0 +1,127 @@
+"""
+AegisTrade — Event Bus
+In-process fan-out of UX, position and PnL events to any number of
+subscribers (the admin /events stream). Every event gets a sequence number;
+a subscriber has a bounded buffer that drops its oldest events when the
+consumer falls behind, and can resume from a cursor within the bus history.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Iterable, List, Optional, Set
+
+from backend.config.config import EVENT_BUFFER_SIZE, EVENT_HISTORY_SIZE
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+@dataclass
+class BusEvent:
+    seq: int
+    type: str
+    data: Any
+    ts: float = field(default_factory=time.time)
+
+
+class Subscriber:
+    def __init__(self, maxsize: int, types: Optional[Set[str]] = None) -> None:
+        self.maxsize = maxsize
+        self.types = types
+        self._buf: Deque[BusEvent] = deque()
+        self._ready = asyncio.Event()
+        self._dropped = 0
+        self.closed = False
+
+    def wants(self, ev: BusEvent) -> bool:
+        return self.types is None or ev.type in self.types
+
+    def push(self, ev: BusEvent) -> None:
+        if len(self._buf) >= self.maxsize:
+            self._buf.popleft()
+            self._dropped += 1
+        self._buf.append(ev)
+        self._ready.set()
+
+    def take_dropped(self) -> int:
+        """Events lost to overflow since the last call."""
+        n, self._dropped = self._dropped, 0
+        return n
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[BusEvent]:
+        """Next event, or None on timeout or once the subscriber is closed."""
+        while not self._buf:
+            if self.closed:
+                return None
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._buf.popleft()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+
+class EventBus:
+    def __init__(
+        self,
+        buffer_size: int = EVENT_BUFFER_SIZE,
+        history_size: int = EVENT_HISTORY_SIZE,
+    ) -> None:
+        self.buffer_size = buffer_size
+        self._history: Deque[BusEvent] = deque(maxlen=history_size)
+        self._subscribers: List[Subscriber] = []
+        self._seq = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Any) -> BusEvent:
+        self._seq += 1
+        ev = BusEvent(self._seq, event_type, data)
+        self._history.append(ev)
+        for sub in self._subscribers:
+            if sub.wants(ev):
+                sub.push(ev)
+        return ev
+
+    def subscribe(
+        self,
+        cursor: Optional[int] = None,
+        types: Optional[Iterable[str]] = None,
+    ) -> Subscriber:
+        """
+        Register a subscriber. With ``cursor`` (the last seq the client saw)
+        it first receives the retained history after that point; if the
+        cursor predates the history, the gap is reported as dropped events.
+        """
+        sub = Subscriber(self.buffer_size, set(types) if types else None)
+        if cursor is not None and cursor < self._seq:
+            oldest = self._history[0].seq if self._history else self._seq + 1
+            if cursor + 1 < oldest:
+                sub._dropped += oldest - cursor - 1
+            for ev in self._history:
+                if ev.seq > cursor and sub.wants(ev):
+                    sub.push(ev)
+        self._subscribers.append(sub)
+        log.debug("Event subscriber added (%d total)", len(self._subscribers))
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        sub.close()
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+        log.debug("Event subscriber removed (%d total)", len(self._subscribers))
+
+
+EVENT_BUS = EventBus()
@@ -0,0 +1,70 @@
+"""
+AegisTrade — HTTP Client
+One pooled connector shared by the price feed and every DEX adapter:
+per-host connection limits, keep-alive and a DNS cache. Each component gets
+its own ClientSession on top of it for its default timeout, but sockets,
+DNS lookups, TLS sessions and the per-host rate limiter are shared.
+"""
+from __future__ import annotations
+from typing import Optional
+
+import aiohttp
+
+from backend.config.config import (
+    HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_KEEPALIVE_S, HTTP_DNS_TTL_S,
+)
+from backend.utils.logger import get_logger
+from backend.utils.rate_limiter import RateLimiter
+
+log = get_logger(__name__)
+
+
+class HttpClient:
+    def __init__(
+        self,
+        limit: int = HTTP_POOL_LIMIT,
+        limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_s: float = HTTP_KEEPALIVE_S,
+        dns_ttl_s: int = HTTP_DNS_TTL_S,
+        limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_s = keepalive_s
+        self.dns_ttl_s = dns_ttl_s
+        self.limiter = limiter or RateLimiter()
+        self._connector: Optional[aiohttp.TCPConnector] = None
+
+    @property
+    def connector(self) -> aiohttp.TCPConnector:
+        """The pool, created on first use inside the running loop."""
+        if self._connector is None or self._connector.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_s,
+                ttl_dns_cache=self.dns_ttl_s,
+                enable_cleanup_closed=True,
+            )
+            log.info(
+                "HTTP pool opened (limit=%d, per host=%d)",
+                self.limit, self.limit_per_host,
+            )
+        return self._connector
+
+    def session(self, timeout_s: float) -> aiohttp.ClientSession:
+        """
+        A session over the shared pool. Closing it leaves the pool open;
+        only ``close`` tears the connections down.
+        """
+        return aiohttp.ClientSession(
+            connector=self.connector,
+            connector_owner=False,
+            timeout=aiohttp.ClientTimeout(total=timeout_s),
+        )
+
+    async def close(self) -> None:
+        if self._connector is not None and not self._connector.closed:
+            await self._connector.close()
+            log.info("HTTP pool closed")
+        self._connector = None
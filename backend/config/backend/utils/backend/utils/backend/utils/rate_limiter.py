@@ -0,0 +1,126 @@
+"""
+AegisTrade — Rate Limiter
+Client-side token buckets per API host, spent by request weight. Requests
+that cannot go yet queue by priority, so order placement is never stuck
+behind a candle backfill. Below PRIORITY_ORDER a slice of every bucket is
+held back as headroom for orders.
+"""
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from yarl import URL
+
+from backend.config.config import RATE_LIMITS, RATE_LIMIT_RESERVE_PCT
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+PRIORITY_ORDER = 0
+PRIORITY_MARKET = 1
+PRIORITY_BACKFILL = 2
+
+
+class _Bucket:
+    def __init__(
+        self, capacity: float, refill_per_s: float, reserve_pct: float,
+        clock: Callable[[], float],
+    ) -> None:
+        self.capacity = capacity
+        self.refill_per_s = refill_per_s
+        self.reserve = capacity * reserve_pct
+        self._clock = clock
+        self.tokens = capacity
+        self._updated = clock()
+        self.waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = 0
+        self.queued_total = 0
+
+    def refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.refill_per_s
+        )
+        self._updated = now
+
+    def drain(self) -> None:
+        """Grant waiters in priority order while tokens allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self.refill()
+        while self.waiters:
+            priority, _, weight, fut = self.waiters[0]
+            if fut.done():  # cancelled while queued
+                heapq.heappop(self.waiters)
+                continue
+            need = weight + (self.reserve if priority > PRIORITY_ORDER else 0.0)
+            if self.tokens < need:
+                delay = (need - self.tokens) / self.refill_per_s
+                self._timer = asyncio.get_running_loop().call_later(delay, self.drain)
+                return
+            heapq.heappop(self.waiters)
+            self.tokens -= weight
+            self.granted += 1
+            fut.set_result(None)
+
+    def snapshot(self) -> dict:
+        self.refill()
+        return {
+            "capacity": self.capacity,
+            "tokens": round(self.tokens, 2),
+            "headroom_pct": round(self.tokens / self.capacity * 100, 1),
+            "queued": sum(1 for *_, f in self.waiters if not f.done()),
+            "granted": self.granted,
+            "queued_total": self.queued_total,
+        }
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        limits: Mapping[str, Tuple[float, float]] = RATE_LIMITS,
+        reserve_pct: float = RATE_LIMIT_RESERVE_PCT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._buckets: Dict[str, _Bucket] = {
+            host: _Bucket(capacity, per_s, reserve_pct, clock)
+            for host, (capacity, per_s) in limits.items()
+        }
+        self._seq = itertools.count()
+
+    async def acquire(
+        self, url: str, weight: float = 1.0, priority: int = PRIORITY_MARKET
+    ) -> None:
+        """Wait until ``weight`` tokens for ``url``'s host may be spent."""
+        bucket = self._buckets.get(URL(url).host or "")
+        if bucket is None:
+            return
+        weight = min(weight, bucket.capacity - bucket.reserve)
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(bucket.waiters, (priority, next(self._seq), weight, fut))
+        bucket.drain()
+        if fut.done():
+            return
+        bucket.queued_total += 1
+        try:
+            await fut
+        finally:
+            if fut.cancelled():
+                bucket.drain()
+
+    def headroom(self, url_or_host: str) -> Optional[float]:
+        """Fraction of the host's bucket currently available, if limited."""
+        host = URL(url_or_host).host or url_or_host
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            return None
+        bucket.refill()
+        return bucket.tokens / bucket.capacity
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {host: b.snapshot() for host, b in self._buckets.items()}
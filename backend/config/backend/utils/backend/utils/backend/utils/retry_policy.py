@@ -0,0 +1,151 @@
+"""
+AegisTrade — Retry Policy
+When and how long to wait before retrying a venue request: only retryable
+failures, full-jitter exponential backoff, Retry-After honoured, and a
+token-bucket budget per venue so an outage cannot turn into a retry storm.
+"""
+from __future__ import annotations
+import asyncio
+import random
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import aiohttp
+
+from backend.config.config import (
+    MAX_RETRIES, RETRY_BASE_S, RETRY_DELAY_S,
+    RETRY_BUDGET_TOKENS, RETRY_BUDGET_REFILL_PER_S,
+)
+
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def is_retryable_status(status: int) -> bool:
+    return status in RETRYABLE_STATUS
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """Timeouts and dropped connections are transient; bad payloads are not."""
+    if isinstance(exc, aiohttp.ContentTypeError):
+        return False
+    return isinstance(exc, (
+        asyncio.TimeoutError,
+        aiohttp.ClientConnectionError,
+        aiohttp.ClientPayloadError,
+    ))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """Token bucket: each retry spends a token; tokens refill over time."""
+
+    def __init__(
+        self,
+        capacity: float = RETRY_BUDGET_TOKENS,
+        refill_per_s: float = RETRY_BUDGET_REFILL_PER_S,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.capacity = capacity
+        self.refill_per_s = refill_per_s
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    @property
+    def tokens(self) -> float:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.refill_per_s
+        )
+        self._updated = now
+        return self._tokens
+
+    def try_acquire(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class RetryStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.succeeded = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.budget_exhausted = 0
+        self.failures: Counter = Counter()
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "succeeded": self.succeeded,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "budget_exhausted": self.budget_exhausted,
+            "failures": dict(self.failures),
+        }
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = MAX_RETRIES,
+        base_s: float = RETRY_BASE_S,
+        max_delay_s: float = RETRY_DELAY_S,
+        budget: Optional[RetryBudget] = None,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_s = base_s
+        self.max_delay_s = max_delay_s
+        self.budget = budget or RetryBudget()
+        self.stats = RetryStats()
+        self._rng = rng or random.Random()
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(max_delay, base * 2**attempt)]."""
+        return self._rng.uniform(0, min(self.max_delay_s, self.base_s * 2 ** attempt))
+
+    def next_delay(
+        self,
+        attempt: int,
+        reason: str,
+        retryable: bool,
+        retry_after: Optional[float] = None,
+    ) -> Optional[float]:
+        """
+        Seconds to wait before attempt ``attempt + 1``, or None to give up.
+        A Retry-After longer than the longest backoff also means give up:
+        waiting that long would only make the order stale.
+        """
+        self.stats.failures[reason] += 1
+        if (
+            not retryable
+            or attempt + 1 >= self.max_attempts
+            or (retry_after is not None and retry_after > self.max_delay_s)
+        ):
+            self.stats.gave_up += 1
+            return None
+        if not self.budget.try_acquire():
+            self.stats.budget_exhausted += 1
+            self.stats.gave_up += 1
+            return None
+        self.stats.retries += 1
+        delay = self.backoff(attempt)
+        return max(delay, retry_after) if retry_after is not None else delay
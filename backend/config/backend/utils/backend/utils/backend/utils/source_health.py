@@ -0,0 +1,124 @@
+"""
+AegisTrade — Source Health
+Per-upstream latency and error tracking with a circuit breaker. A source
+that keeps failing is skipped until a cooldown passes, after which a single
+probe decides whether it is back.
+"""
+from __future__ import annotations
+import time
+from collections import deque
+from typing import Callable, Deque, Optional
+
+from backend.config.config import (
+    SOURCE_BREAKER_FAILURES, SOURCE_BREAKER_ERROR_RATE, SOURCE_BREAKER_COOLDOWN_S,
+    SOURCE_LATENCY_WINDOW,
+)
+from backend.utils.logger import get_logger
+
+log = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Smoothing for the latency and error-rate EWMAs.
+ALPHA = 0.2
+# Calls observed before the error rate alone may trip the breaker.
+MIN_SAMPLES = 10
+
+
+class SourceHealth:
+    def __init__(
+        self,
+        name: str,
+        failures: int = SOURCE_BREAKER_FAILURES,
+        error_rate: float = SOURCE_BREAKER_ERROR_RATE,
+        cooldown_s: float = SOURCE_BREAKER_COOLDOWN_S,
+        window: int = SOURCE_LATENCY_WINDOW,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_failures = failures
+        self.max_error_rate = error_rate
+        self.cooldown_s = cooldown_s
+        self._clock = clock
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether to call the source now; claims the probe when half-open."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and self._clock() - self._opened_at >= self.cooldown_s:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Hand back a claimed probe that was cancelled before it answered."""
+        self._probing = False
+
+    def record_success(self, latency: float) -> None:
+        self._observe(latency, failed=False)
+        self._latencies.append(latency)
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            log.info("Source %s recovered", self.name)
+        self.state = CLOSED
+        self._probing = False
+
+    def record_failure(self, latency: float) -> None:
+        self._observe(latency, failed=True)
+        self.consecutive_failures += 1
+        tripped = (
+            self.state == HALF_OPEN
+            or self.consecutive_failures >= self.max_failures
+            or (self.calls >= MIN_SAMPLES and self.error_rate >= self.max_error_rate)
+        )
+        if tripped:
+            if self.state != OPEN:
+                log.warning(
+                    "Source %s circuit open for %.0fs (error rate %.0f%%)",
+                    self.name, self.cooldown_s, self.error_rate * 100,
+                )
+            self.state = OPEN
+            self._opened_at = self._clock()
+            self._probing = False
+
+    def _observe(self, latency: float, failed: bool) -> None:
+        self.calls += 1
+        self.error_rate = (1 - ALPHA) * self.error_rate + ALPHA * float(failed)
+        self.latency_ewma = (
+            latency if self.latency_ewma is None
+            else (1 - ALPHA) * self.latency_ewma + ALPHA * latency
+        )
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile ``q`` of recent successful calls."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self) -> dict:
+        p95 = self.latency_percentile(0.95)
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "error_rate": round(self.error_rate, 4),
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ewma_ms": (
+                round(self.latency_ewma * 1000, 1)
+                if self.latency_ewma is not None else None
+            ),
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
@@ -0,0 +1,67 @@
+"""
+AegisTrade — TTL Cache
+Async memoisation with per-entry expiry and single-flight loading: while a
+key is being fetched, concurrent callers await the same request.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def _retrieve(task: asyncio.Future) -> None:
+    """Mark a failed load's error retrieved when every waiter has gone."""
+    if not task.cancelled():
+        task.exception()
+
+
+class AsyncTTLCache:
+    def __init__(self, ttl_s: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._values: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._values.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    async def get_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        entry = self._values.get(key)
+        if entry is not None and entry[0] > self._clock():
+            self.hits += 1
+            return entry[1]
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+        else:
+            # The load runs as its own task, so a caller that is cancelled
+            # does not take the result away from the others waiting on it.
+            self.misses += 1
+            pending = asyncio.ensure_future(self._load(key, loader))
+            pending.add_done_callback(_retrieve)
+            self._inflight[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        finally:
+            self._inflight.pop(key, None)
+        # Failures are not cached; waiters see the same error.
+        self._values[key] = (self._clock() + self.ttl_s, value)
+        return value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Drop every entry, or those whose key matches ``predicate``."""
+        if predicate is None:
+            self._values.clear()
+            return
+        for key in [k for k in self._values if predicate(k)]:
+            del self._values[key]
@@ -5,11 +5,22 @@ from __future__ import annotations
 import asyncio
 from dataclasses import dataclass, field
 from typing import Optional
+from backend.utils.event_bus import EVENT_BUS
 from backend.utils.logger import get_logger
 
 log = get_logger(__name__)
 
 UX_EVENT_QUEUE: asyncio.Queue = asyncio.Queue(maxsize=256)
+_ENABLED = True
+
+
+def set_enabled(enabled: bool) -> None:
+    global _ENABLED
+    _ENABLED = enabled
+
+
+def is_enabled() -> bool:
+    return _ENABLED
 
 
 @dataclass
@@ -20,11 +31,14 @@ class UXEvent:
 
 
 async def emit(event_type: str, name: str, **payload) -> None:
+    if not _ENABLED:
+        return
     ev = UXEvent(event_type=event_type, name=name, payload=payload)
     try:
         UX_EVENT_QUEUE.put_nowait(ev)
     except asyncio.QueueFull:
         log.warning("UX event queue full — dropping %s/%s", event_type, name)
+    EVENT_BUS.publish("ux", {"type": event_type, "name": name, **payload})
     log.debug("UX event: %s/%s %s", event_type, name, payload)
 
 
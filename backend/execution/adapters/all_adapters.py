@@ -3,14 +3,25 @@ AegisTrade — DEX Adapters
 """
 from __future__ import annotations
 import asyncio
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
 import aiohttp
 
-from backend.config.config import MAX_RETRIES, RETRY_DELAY_S
+from backend.config.config import (
+    DEX_FEE_TTL_S, DEX_LIQUIDITY_TTL_S,
+    DEX_BOOK_TTL_S, DEX_HTTP_TIMEOUT_S, HYPERLIQUID_API, HYPERLIQUID_WEIGHTS,
+)
+from backend.execution.order_book import OrderBook, synthetic_book
+from backend.utils.http_client import HttpClient
 from backend.utils.logger import get_logger
+from backend.utils.rate_limiter import PRIORITY_MARKET, PRIORITY_ORDER
+from backend.utils.retry_policy import (
+    RetryPolicy, is_retryable_error, is_retryable_status, parse_retry_after,
+)
+from backend.utils.ttl_cache import AsyncTTLCache
 
 log = get_logger(__name__)
 
@@ -25,35 +36,78 @@ class OrderResult:
     fee: float = 0.0
     error: str = ""
     simulated: bool = False
+    # Per-venue fills when this result aggregates a split order.
+    children: List["OrderResult"] = field(default_factory=list)
+
+
+@dataclass
+class LiquiditySnapshot:
+    """
+    What a venue has said about order sizes for one symbol: any notional up
+    to ``max_ok`` fits and anything from ``min_rejected`` up does not.
+    """
+    expires: float
+    max_ok: float = 0.0
+    min_rejected: float = field(default=float("inf"))
 
 
 class BaseDEXAdapter(ABC):
     name: str = "base"
+    # Shape of the modelled book for venues without a public L2 feed.
+    book_levels: int = 20
+    book_level_usd: float = 50_000.0
+    book_tick_pct: float = 0.0001
 
-    def __init__(self, dry_run: bool = True) -> None:
+    def __init__(self, dry_run: bool = True, http: Optional[HttpClient] = None) -> None:
         self.dry_run = dry_run
+        self._http = http
+        self._owns_http = http is None
         self._session: Optional[aiohttp.ClientSession] = None
+        self._fee_cache = AsyncTTLCache(DEX_FEE_TTL_S)
+        self._liquidity: Dict[str, LiquiditySnapshot] = {}
+        self._liquidity_probes = AsyncTTLCache(DEX_LIQUIDITY_TTL_S)
+        self._book_cache = AsyncTTLCache(DEX_BOOK_TTL_S)
+        # One policy per venue, so its retry budget is the venue's own.
+        self.retry = RetryPolicy()
 
     async def start(self) -> None:
-        self._session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=10)
-        )
+        if self._http is None:
+            self._http = HttpClient()
+        self._session = self._http.session(DEX_HTTP_TIMEOUT_S)
 
     async def stop(self) -> None:
         if self._session:
             await self._session.close()
-
-    async def _post_with_retry(self, url: str, payload: dict) -> Optional[dict]:
-        for attempt in range(MAX_RETRIES):
+        if self._owns_http and self._http is not None:
+            await self._http.close()
+
+    async def _post_with_retry(
+        self, url: str, payload: dict,
+        weight: float = 1.0, priority: int = PRIORITY_ORDER,
+    ) -> Optional[dict]:
+        policy = self.retry
+        policy.stats.requests += 1
+        for attempt in range(policy.max_attempts):
+            retry_after = None
+            await self._http.limiter.acquire(url, weight, priority)
             try:
                 async with self._session.post(url, json=payload) as r:
                     if r.status == 200:
-                        return await r.json()
+                        data = await r.json()
+                        policy.stats.succeeded += 1
+                        return data
+                    reason = f"http_{r.status}"
+                    retryable = is_retryable_status(r.status)
+                    retry_after = parse_retry_after(r.headers.get("Retry-After"))
                     log.warning("%s HTTP %d attempt %d", self.name, r.status, attempt + 1)
             except Exception as e:
+                reason = type(e).__name__
+                retryable = is_retryable_error(e)
                 log.warning("%s error (attempt %d): %s", self.name, attempt + 1, e)
-            if attempt < MAX_RETRIES - 1:
-                await asyncio.sleep(RETRY_DELAY_S)
+            delay = policy.next_delay(attempt, reason, retryable, retry_after)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
         return None
 
     def _sim_result(self, symbol: str, side: str, qty: float, price: float) -> OrderResult:
@@ -79,9 +133,84 @@ class BaseDEXAdapter(ABC):
     @abstractmethod
     async def check_liquidity(self, symbol: str, qty: float, price: float) -> bool: ...
 
+    async def fetch_order_book(self, symbol: str) -> Optional[OrderBook]:
+        """Live L2 snapshot, or None where the venue has no public book feed."""
+        return None
+
+    def model_book(self, symbol: str, price: float) -> OrderBook:
+        """Book modelled around ``price`` from the venue's book shape."""
+        return synthetic_book(
+            symbol, price, self.book_levels, self.book_level_usd, self.book_tick_pct
+        )
+
+    async def get_order_book(self, symbol: str, price: float) -> OrderBook:
+        """Live L2 snapshot, falling back to the model around ``price``."""
+        book = await self.fetch_order_book(symbol)
+        return book if book is not None else self.model_book(symbol, price)
+
+    # ── cached lookups ──
+
+    async def cached_fee_estimate(self, symbol: str, qty: float) -> float:
+        """Fee rate per symbol, refreshed every DEX_FEE_TTL_S."""
+        return await self._fee_cache.get_or_load(
+            symbol, lambda: self.get_fee_estimate(symbol, qty)
+        )
+
+    async def cached_liquidity(self, symbol: str, qty: float, price: float) -> bool:
+        """
+        check_liquidity answered from a per-symbol snapshot while it is
+        younger than DEX_LIQUIDITY_TTL_S. Liquidity is taken to be monotone
+        in notional, so sizes between a known fit and a known rejection are
+        the only ones that reach the venue.
+        """
+        notional = qty * price
+        now = time.monotonic()
+        snap = self._liquidity.get(symbol)
+        if snap is None or snap.expires <= now:
+            snap = self._liquidity[symbol] = LiquiditySnapshot(
+                expires=now + DEX_LIQUIDITY_TTL_S
+            )
+        if notional <= snap.max_ok:
+            return True
+        if notional >= snap.min_rejected:
+            return False
+        ok = await self._liquidity_probes.get_or_load(
+            (symbol, qty, price), lambda: self.check_liquidity(symbol, qty, price)
+        )
+        if ok:
+            snap.max_ok = max(snap.max_ok, notional)
+        else:
+            snap.min_rejected = min(snap.min_rejected, notional)
+        return ok
+
+    async def cached_order_book(self, symbol: str, price: float) -> OrderBook:
+        """
+        Live books are cached per symbol for DEX_BOOK_TTL_S. Modelled books
+        depend on ``price``, so they are rebuilt on every call instead.
+        """
+        book = await self._book_cache.get_or_load(
+            symbol, lambda: self.fetch_order_book(symbol)
+        )
+        return book if book is not None else self.model_book(symbol, price)
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Forget cached fees, liquidity and books, e.g. after a fill on ``symbol``."""
+        if symbol is None:
+            self._fee_cache.invalidate()
+            self._liquidity.clear()
+            self._liquidity_probes.invalidate()
+            self._book_cache.invalidate()
+            return
+        self._fee_cache.invalidate(lambda k: k == symbol)
+        self._liquidity.pop(symbol, None)
+        self._liquidity_probes.invalidate(lambda k: k[0] == symbol)
+        self._book_cache.invalidate(lambda k: k == symbol)
+
 
 class HyperliquidAdapter(BaseDEXAdapter):
     name = "hyperliquid"
+    book_level_usd = 250_000.0
+    book_tick_pct = 0.00005
 
     async def place_order(self, symbol: str, side: str, qty: float, price: float) -> OrderResult:
         if self.dry_run:
@@ -98,9 +227,33 @@ class HyperliquidAdapter(BaseDEXAdapter):
     async def check_liquidity(self, symbol: str, qty: float, price: float) -> bool:
         return True
 
+    async def fetch_order_book(self, symbol: str) -> Optional[OrderBook]:
+        if self.dry_run or self._session is None:
+            return None
+        coin = symbol.split("-")[0]
+        data = await self._post_with_retry(
+            f"{HYPERLIQUID_API}/info", {"type": "l2Book", "coin": coin},
+            HYPERLIQUID_WEIGHTS["l2Book"], PRIORITY_MARKET,
+        )
+        if data is None:
+            log.warning("Hyperliquid l2Book %s unavailable — using model", coin)
+            return None
+        try:
+            bids, asks = data["levels"]
+            return OrderBook(
+                symbol,
+                [(float(l["px"]), float(l["sz"])) for l in bids],
+                [(float(l["px"]), float(l["sz"])) for l in asks],
+                ts=data.get("time", time.time() * 1000) / 1000,
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            log.warning("Hyperliquid l2Book %s malformed: %s — using model", coin, e)
+            return None
+
 
 class DydxAdapter(BaseDEXAdapter):
     name = "dydx"
+    book_level_usd = 100_000.0
 
     async def place_order(self, symbol: str, side: str, qty: float, price: float) -> OrderResult:
         if self.dry_run:
@@ -120,6 +273,7 @@ class DydxAdapter(BaseDEXAdapter):
 
 class GmxAdapter(BaseDEXAdapter):
     name = "gmx"
+    book_level_usd = 250.0
 
     async def place_order(self, symbol: str, side: str, qty: float, price: float) -> OrderResult:
         if self.dry_run:
@@ -158,6 +312,7 @@ class ApexAdapter(BaseDEXAdapter):
 
 class KwentaAdapter(BaseDEXAdapter):
     name = "kwenta"
+    book_level_usd = 100.0
 
     async def place_order(self, symbol: str, side: str, qty: float, price: float) -> OrderResult:
         if self.dry_run:
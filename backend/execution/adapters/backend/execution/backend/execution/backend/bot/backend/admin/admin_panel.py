@@ -3,15 +3,20 @@ AegisTrade — Admin Panel
 """
 from __future__ import annotations
 import asyncio
+import hashlib
 import json
 import time
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Any
-from urllib.parse import urlparse
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
-from backend.config.config import ADMIN_HOST, ADMIN_PORT, ADMIN_TOKEN
+from aiohttp import web
+
+from backend.config.config import (
+    ADMIN_HOST, ADMIN_PORT, ADMIN_TOKEN, EVENT_HEARTBEAT_S,
+)
 from backend.analytics.pnl_engine import PnLEngine
 from backend.referral.referral_system import ReferralSystem
+from backend.state.storage import TradeQueryStore
+from backend.utils.event_bus import EVENT_BUS
 from backend.utils.logger import get_logger
 from backend.utils.i18n import t, set_language
 
@@ -20,212 +25,406 @@ log = get_logger(__name__)
 _pnl_engine = PnLEngine()
 _bot_loop = None
 _referral: ReferralSystem | None = None
+_bot_task: Optional[asyncio.Task] = None
 
+# path+query → (state version, etag, serialized body)
+_CACHE: Dict[str, Tuple[int, str, bytes]] = {}
+_CACHE_MAX = 256
 
-def _json(data: Any) -> bytes:
-    return json.dumps(data, default=str).encode()
-
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
 
-def _cors(handler: BaseHTTPRequestHandler) -> None:
-    handler.send_header("Access-Control-Allow-Origin", "*")
-    handler.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-    handler.send_header("Access-Control-Allow-Headers", "Authorization, Content-Type")
-    handler.send_header("Content-Type", "application/json")
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Authorization, Content-Type",
+}
 
 
-class AegisHandler(BaseHTTPRequestHandler):
-    def log_message(self, format, *args):
-        log.debug("Admin: " + format, *args)
+def _json(data: Any) -> bytes:
+    return json.dumps(data, default=str).encode()
 
-    def _auth(self) -> bool:
-        token = self.headers.get("Authorization", "").replace("Bearer ", "")
-        return token == ADMIN_TOKEN
 
-    def _send(self, code: int, data: Any) -> None:
+def _send(code: int, data: Any) -> web.Response:
+    return web.Response(
+        status=code, body=_json(data), content_type="application/json"
+    )
+
+
+async def _cached(request: web.Request, build: Callable[[], Any]) -> web.Response:
+    """
+    Serve ``build()`` serialized once per StateManager version, with an
+    ETag so unchanged polls get 304 Not Modified. ``build`` may be async.
+    """
+    version = _bot_loop.state.version
+    key = request.path_qs
+    hit = _CACHE.get(key)
+    if hit is None or hit[0] != version:
+        data = build()
+        if asyncio.iscoroutine(data):
+            data = await data
         body = _json(data)
-        self.send_response(code)
-        _cors(self)
-        self.send_header("Content-Length", len(body))
-        self.end_headers()
-        self.wfile.write(body)
-
-    def _body(self) -> dict:
-        length = int(self.headers.get("Content-Length", 0))
-        if length == 0:
-            return {}
-        return json.loads(self.rfile.read(length))
-
-    def do_OPTIONS(self):
-        self.send_response(204)
-        _cors(self)
-        self.end_headers()
-
-    def do_GET(self):
-        if not self._auth():
-            self._send(401, {"error": "Unauthorized"})
-            return
-        path = urlparse(self.path).path
-        state = _bot_loop.state if _bot_loop else None
-
-        if path == "/status":
-            from backend.bot import trading_loop as tl
-            self._send(200, {
-                "running": tl.is_running(),
-                "dry_run": tl.is_dry_run(),
-                "regime": state.current_regime if state else "unknown",
-                "locked": state.system_locked if state else False,
-                "halted": state.trading_halted if state else False,
-                "uptime": time.time(),
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        if len(_CACHE) >= _CACHE_MAX:
+            _CACHE.clear()
+        hit = _CACHE[key] = (version, etag, body)
+    _, etag, body = hit
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return web.Response(status=304, headers=headers)
+    return web.Response(
+        status=200, body=body, content_type="application/json", headers=headers
+    )
+
+
+def _trade_filters(query) -> dict:
+    """symbol/strategy/dex/since/until query parameters for PnL reports."""
+    filters: dict = {k: query[k] for k in ("symbol", "strategy", "dex") if k in query}
+    for k in ("since", "until"):
+        if k in query:
+            filters[k] = float(query[k])
+    return filters
+
+
+async def _body(request: web.Request) -> dict:
+    if not request.can_read_body:
+        return {}
+    return await request.json()
+
+
+@web.middleware
+async def _cors_middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+    if request.method == "OPTIONS":
+        resp: web.StreamResponse = web.Response(status=204)
+    else:
+        resp = await handler(request)
+    if not resp.prepared:
+        resp.headers.update(CORS_HEADERS)
+    log.debug("Admin: %s %s %s", request.method, request.path, resp.status)
+    return resp
+
+
+@web.middleware
+async def _auth_middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+    token = request.headers.get("Authorization", "").replace("Bearer ", "")
+    if not token and request.path == "/events":
+        # EventSource cannot send headers.
+        token = request.query.get("token", "")
+    if token != ADMIN_TOKEN:
+        return _send(401, {"error": "Unauthorized"})
+    try:
+        return await handler(request)
+    except web.HTTPNotFound:
+        return _send(404, {"error": "Not found"})
+    except web.HTTPMethodNotAllowed:
+        return _send(405, {"error": "Method not allowed"})
+    except json.JSONDecodeError:
+        return _send(400, {"error": "Invalid JSON body"})
+
+
+def _state():
+    return _bot_loop.state if _bot_loop else None
+
+
+# ── GET ──────────────────────────────────────────────────────────────────────
+
+async def get_status(request: web.Request) -> web.Response:
+    from backend.bot import trading_loop as tl
+    state = _state()
+    return _send(200, {
+        "running": tl.is_running(),
+        "dry_run": tl.is_dry_run(),
+        "regime": state.regime_for(tl.active_symbols()[0]) if state else "unknown",
+        "regimes": state.regimes if state else {},
+        "locked": state.system_locked if state else False,
+        "halted": state.trading_halted if state else False,
+        "uptime": time.time(),
+    })
+
+
+async def get_metrics(request: web.Request) -> web.Response:
+    if not _bot_loop:
+        return _send(503, {"error": "Bot not initialised"})
+    return await _cached(request, _bot_loop.metrics)
+
+
+async def get_positions(request: web.Request) -> web.Response:
+    state = _state()
+    if not state:
+        return _send(503, {"error": "Bot not initialised"})
+    return await _cached(
+        request, lambda: {"positions": list(state.positions.values())}
+    )
+
+
+async def _store_query(state, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call ``fn`` in a worker thread when it queries a trade store."""
+    if isinstance(state.trade_source, TradeQueryStore):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+def _filtered_reports(source, filters: dict) -> tuple:
+    return (
+        _pnl_engine.full_report(source, 50.0, **filters),
+        _pnl_engine.by_symbol(source, **filters),
+        _pnl_engine.by_strategy(source, **filters),
+    )
+
+
+async def _pnl_payload(state, filters: dict) -> dict:
+    if filters:
+        summary, by_symbol, by_strategy = await _store_query(
+            state, _filtered_reports, state.trade_source, filters
+        )
+    else:
+        # The live tracker is mutated on the loop, so it is read there.
+        tracker = _bot_loop.pnl_tracker
+        summary = tracker.report()
+        by_symbol = tracker.by_symbol()
+        by_strategy = tracker.by_strategy()
+    history = await _store_query(state, state.recent_trades, 50, **filters)
+    return {
+        "summary": summary,
+        "by_symbol": by_symbol,
+        "by_strategy": by_strategy,
+        "history": history,
+    }
+
+
+async def get_pnl(request: web.Request) -> web.Response:
+    state = _state()
+    if not state:
+        return _send(503, {"error": "Bot not initialised"})
+    try:
+        filters = _trade_filters(request.query)
+    except ValueError:
+        return _send(400, {"error": "since/until must be numbers"})
+    return await _cached(request, lambda: _pnl_payload(state, filters))
+
+
+async def get_pnl_rollup(request: web.Request) -> web.Response:
+    if not _bot_loop:
+        return _send(503, {"error": "Bot not initialised"})
+    query = request.query
+    rollup = _bot_loop.pnl_rollup
+    try:
+        group_by = [g for g in query.get("group_by", "").split(",") if g]
+        filters = _trade_filters(query)
+        return await _cached(request, lambda: {"buckets": rollup.query(
+            resolution=query.get("resolution", "day"),
+            group_by=group_by,
+            **filters,
+        )})
+    except ValueError as e:
+        return _send(400, {"error": str(e)})
+
+
+async def get_risk(request: web.Request) -> web.Response:
+    if not _bot_loop:
+        return _send(503, {"error": "Bot not initialised"})
+    return await _cached(request, _bot_loop.risk.snapshot)
+
+
+async def get_feed_health(request: web.Request) -> web.Response:
+    if not _bot_loop:
+        return _send(503, {"error": "Bot not initialised"})
+    # Changes on every poll, not with state, so never cached.
+    return _send(200, {"sources": _bot_loop.feed.health_snapshot()})
+
+
+async def get_venues(request: web.Request) -> web.Response:
+    if not _bot_loop:
+        return _send(503, {"error": "Bot not initialised"})
+    return _send(200, {"venues": _bot_loop.router.venue_stats()})
+
+
+async def get_rate_limits(request: web.Request) -> web.Response:
+    if not _bot_loop:
+        return _send(503, {"error": "Bot not initialised"})
+    return _send(200, {"hosts": _bot_loop.http.limiter.snapshot()})
+
+
+async def get_referral(request: web.Request) -> web.Response:
+    if not _referral:
+        return _send(503, {"error": "Referral not initialised"})
+    return _send(200, {
+        "codes": _referral.list_codes(),
+        "tiers": _referral.subscription_tiers()
+    })
+
+
+async def get_ux_events(request: web.Request) -> web.Response:
+    from backend.utils.ux_effects import UX_EVENT_QUEUE
+    events = []
+    while not UX_EVENT_QUEUE.empty():
+        try:
+            ev = UX_EVENT_QUEUE.get_nowait()
+            events.append({
+                "type": ev.event_type,
+                "name": ev.name,
+                **ev.payload
             })
-
-        elif path == "/metrics":
-            if state:
-                report = _pnl_engine.full_report(state.trades, 50.0)
-                self._send(200, {
-                    **report,
-                    "balance": round(state.balance, 2),
-                    "equity": round(state.equity, 2),
-                    "daily_pnl": round(state.daily_pnl, 2),
-                    "weekly_pnl": round(state.weekly_pnl, 2),
-                    "total_pnl": round(state.total_pnl, 2),
-                })
-            else:
-                self._send(503, {"error": "Bot not initialised"})
-
-        elif path == "/positions":
-            if state:
-                self._send(200, {"positions": list(state.positions.values())})
-            else:
-                self._send(503, {"error": "Bot not initialised"})
-
-        elif path == "/pnl":
-            if state:
-                self._send(200, {
-                    "summary": _pnl_engine.full_report(state.trades, 50.0),
-                    "by_symbol": _pnl_engine.by_symbol(state.trades),
-                    "by_strategy": _pnl_engine.by_strategy(state.trades),
-                    "history": state.trades[-50:],
-                })
-            else:
-                self._send(503, {"error": "Bot not initialised"})
-
-        elif path == "/risk":
-            if _bot_loop:
-                self._send(200, _bot_loop.risk.snapshot())
-            else:
-                self._send(503, {"error": "Bot not initialised"})
-
-        elif path == "/referral":
-            if _referral:
-                self._send(200, {
-                    "codes": _referral.list_codes(),
-                    "tiers": _referral.subscription_tiers()
-                })
-            else:
-                self._send(503, {"error": "Referral not initialised"})
-
-        elif path == "/ux_events":
-            from backend.utils.ux_effects import UX_EVENT_QUEUE
-            events = []
-            while not UX_EVENT_QUEUE.empty():
-                try:
-                    ev = UX_EVENT_QUEUE.get_nowait()
-                    events.append({
-                        "type": ev.event_type,
-                        "name": ev.name,
-                        **ev.payload
-                    })
-                except Exception:
+        except Exception:
+            break
+    return _send(200, {"events": events})
+
+
+def _sse(event: str, data: Any, seq: Optional[int] = None) -> bytes:
+    head = f"id: {seq}\n" if seq is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+async def get_events(request: web.Request) -> web.StreamResponse:
+    """
+    Server-sent event stream of ux, position and pnl events. Resume with
+    the Last-Event-ID header or ``?cursor=``; ``?types=ux,pnl`` filters.
+    A ``dropped`` event reports events this client missed.
+    """
+    cursor = request.headers.get("Last-Event-ID") or request.query.get("cursor")
+    types = [x for x in request.query.get("types", "").split(",") if x]
+    try:
+        cursor = int(cursor) if cursor is not None else None
+    except ValueError:
+        return _send(400, {"error": "cursor must be an integer"})
+
+    resp = web.StreamResponse(headers={
+        **CORS_HEADERS,
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+    })
+    await resp.prepare(request)
+    sub = EVENT_BUS.subscribe(cursor, types)
+    try:
+        if _bot_loop and cursor is None:
+            await resp.write(_sse("pnl", _bot_loop.metrics(), EVENT_BUS.seq))
+        while True:
+            ev = await sub.get(timeout=EVENT_HEARTBEAT_S)
+            dropped = sub.take_dropped()
+            if dropped:
+                await resp.write(_sse("dropped", {"count": dropped}))
+            if ev is None:
+                if sub.closed:
                     break
-            self._send(200, {"events": events})
-
-        else:
-            self._send(404, {"error": "Not found"})
-
-    def do_POST(self):
-        if not self._auth():
-            self._send(401, {"error": "Unauthorized"})
-            return
-        path = urlparse(self.path).path
-        body = self._body()
-
-        if path == "/start":
-            from backend.bot import trading_loop as tl
-            if tl.is_running():
-                self._send(200, {"status": "already_running"})
-                return
-            asyncio.create_task(tl.get_loop().run())
-            self._send(200, {"status": "started"})
-
-        elif path == "/stop":
-            from backend.bot import trading_loop as tl
-            tl.set_running(False)
-            self._send(200, {"status": "stopped"})
-
-        elif path == "/mode":
-            dry = body.get("dry_run", True)
-            from backend.bot import trading_loop as tl
-            tl.set_mode(bool(dry))
-            mode = "DRY_RUN" if dry else "LIVE"
-            log.info(t("mode_switched", mode=mode))
-            self._send(200, {"mode": mode})
-
-        elif path == "/settings":
-            lang = body.get("lang")
-            if lang:
-                set_language(lang)
-            symbol = body.get("symbol")
-            if symbol:
-                from backend.bot import trading_loop as tl
-                tl.set_symbol(symbol)
-            self._send(200, {"status": "updated"})
-
-        elif path == "/referral/generate":
-            if not _referral:
-                self._send(503, {"error": "Referral not initialised"})
-                return
-            owner = body.get("owner", "admin")
-            tier = body.get("tier", "basic")
-            code = _referral.generate_code(owner, tier)
-            loop = asyncio.new_event_loop()
-            data = loop.run_until_complete(
-                _referral.register_code(code, owner, tier)
-            )
-            loop.close()
-            self._send(200, {
-                "code": code,
-                "link": _referral.get_link(code),
-                **data
-            })
-
-        elif path == "/risk/unlock":
-            if _bot_loop:
-                loop = asyncio.new_event_loop()
-                loop.run_until_complete(_bot_loop.state.set_locked(False))
-                loop.run_until_complete(_bot_loop.state.set_halted(False))
-                loop.close()
-                self._send(200, {"status": "unlocked"})
-            else:
-                self._send(503, {"error": "Bot not initialised"})
-
-        else:
-            self._send(404, {"error": "Not found"})
+                await resp.write(b": keep-alive\n\n")
+                continue
+            await resp.write(_sse(ev.type, ev.data, ev.seq))
+    except ConnectionResetError:
+        pass
+    finally:
+        EVENT_BUS.unsubscribe(sub)
+    return resp
+
+
+# ── POST ─────────────────────────────────────────────────────────────────────
+
+async def post_start(request: web.Request) -> web.Response:
+    global _bot_task
+    from backend.bot import trading_loop as tl
+    if tl.is_running():
+        return _send(200, {"status": "already_running"})
+    _bot_task = asyncio.create_task(tl.get_loop().run())
+    return _send(200, {"status": "started"})
+
+
+async def post_stop(request: web.Request) -> web.Response:
+    from backend.bot import trading_loop as tl
+    tl.set_running(False)
+    return _send(200, {"status": "stopped"})
+
+
+async def post_mode(request: web.Request) -> web.Response:
+    body = await _body(request)
+    dry = body.get("dry_run", True)
+    from backend.bot import trading_loop as tl
+    tl.set_mode(bool(dry))
+    mode = "DRY_RUN" if dry else "LIVE"
+    log.info(t("mode_switched", mode=mode))
+    return _send(200, {"mode": mode})
+
+
+async def post_settings(request: web.Request) -> web.Response:
+    body = await _body(request)
+    lang = body.get("lang")
+    if lang:
+        set_language(lang)
+    symbol = body.get("symbol")
+    if symbol:
+        from backend.bot import trading_loop as tl
+        tl.set_symbol(symbol)
+    multi = body.get("multi_symbol")
+    if multi is not None:
+        from backend.bot import trading_loop as tl
+        tl.set_multi_symbol(bool(multi))
+    return _send(200, {"status": "updated"})
+
+
+async def post_referral_generate(request: web.Request) -> web.Response:
+    body = await _body(request)
+    if not _referral:
+        return _send(503, {"error": "Referral not initialised"})
+    owner = body.get("owner", "admin")
+    tier = body.get("tier", "basic")
+    code = _referral.generate_code(owner, tier)
+    data = await _referral.register_code(code, owner, tier)
+    return _send(200, {
+        "code": code,
+        "link": _referral.get_link(code),
+        **data
+    })
+
+
+async def post_risk_unlock(request: web.Request) -> web.Response:
+    if not _bot_loop:
+        return _send(503, {"error": "Bot not initialised"})
+    await _bot_loop.state.set_locked(False)
+    await _bot_loop.state.set_halted(False)
+    return _send(200, {"status": "unlocked"})
+
+
+ROUTES = [
+    ("GET", "/status", get_status),
+    ("GET", "/metrics", get_metrics),
+    ("GET", "/positions", get_positions),
+    ("GET", "/pnl", get_pnl),
+    ("GET", "/pnl/rollup", get_pnl_rollup),
+    ("GET", "/risk", get_risk),
+    ("GET", "/feed/health", get_feed_health),
+    ("GET", "/venues", get_venues),
+    ("GET", "/rate_limits", get_rate_limits),
+    ("GET", "/referral", get_referral),
+    ("GET", "/ux_events", get_ux_events),
+    ("GET", "/events", get_events),
+    ("POST", "/start", post_start),
+    ("POST", "/stop", post_stop),
+    ("POST", "/mode", post_mode),
+    ("POST", "/settings", post_settings),
+    ("POST", "/referral/generate", post_referral_generate),
+    ("POST", "/risk/unlock", post_risk_unlock),
+]
 
 
 def create_admin_server(
     bot_loop_obj, referral_obj: ReferralSystem
-) -> HTTPServer:
+) -> web.Application:
     global _bot_loop, _referral
     _bot_loop = bot_loop_obj
     _referral = referral_obj
-    server = HTTPServer((ADMIN_HOST, ADMIN_PORT), AegisHandler)
-    log.info(t("admin_started", host=ADMIN_HOST, port=ADMIN_PORT))
-    return server
+    app = web.Application(middlewares=[_cors_middleware, _auth_middleware])
+    for method, path, handler in ROUTES:
+        app.router.add_route(method, path, handler)
+    return app
 
 
 async def run_admin_server(
     bot_loop_obj, referral_obj: ReferralSystem
 ) -> None:
-    server = create_admin_server(bot_loop_obj, referral_obj)
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, server.serve_forever)
+    app = create_admin_server(bot_loop_obj, referral_obj)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, ADMIN_HOST, ADMIN_PORT)
+    await site.start()
+    log.info(t("admin_started", host=ADMIN_HOST, port=ADMIN_PORT))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -2,6 +2,7 @@
 AegisTrade — Execution Engine
 """
 from __future__ import annotations
+import math
 import uuid
 from typing import Optional
 
@@ -35,10 +36,36 @@ class ExecutionEngine:
             log.debug(t("no_signal"))
             return None
 
+        # Price the full risk-sized order against the venues' books so the
+        # risk check sees the slippage and fees it would actually pay.
+        size, _ = self.risk.compute_position_size(signal.price, signal.stop_loss)
+        quote = None
+        costs = {}
+        if size > 0:
+            quote = await self.router.quote(
+                signal.symbol, signal.side, size, signal.price
+            )
+        if quote:
+            # Split allocations can sum a few ulps short of the order.
+            short = quote.filled_qty < size
+            if short and not math.isclose(quote.filled_qty, size, rel_tol=1e-9):
+                log.info("Trade blocked: books only fill %.6f of %.6f %s",
+                         quote.filled_qty, size, signal.symbol)
+                return None
+            costs = dict(
+                estimated_fee_pct=quote.fee_pct,
+                estimated_slippage_pct=max(quote.slippage_pct, 0.0),
+            )
+            log.debug("Quote %s %s: vwap=%.4f slippage=%.4f%% fee=%.4f%% via %s",
+                      signal.side, signal.symbol, quote.vwap,
+                      quote.slippage_pct * 100, quote.fee_pct * 100,
+                      ",".join(a.dex for a in quote.allocations))
+
         decision = await self.risk.pre_trade_check(
             symbol=signal.symbol,
             price=signal.price,
             stop_loss=signal.stop_loss,
+            **costs,
         )
         if not decision.allowed:
             log.info("Trade blocked: %s", decision.reason)
@@ -81,6 +108,8 @@ class ExecutionEngine:
             take_profit=signal.take_profit,
             strategy=signal.strategy,
             dex=result.dex,
+            opened_at=self.state.now(),
+            fee=result.fee,
         )
         await self.state.open_position(pos)
         await ux_effects.anim_new_position(signal.symbol)
@@ -109,6 +138,7 @@ class ExecutionEngine:
             price = current_prices.get(symbol)
             if price is None:
                 continue
+            self.state.mark_price(pos_id, price)
             side = pos_data["side"]
             sl = pos_data["stop_loss"]
             tp = pos_data["take_profit"]
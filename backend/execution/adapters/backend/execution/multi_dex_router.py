@@ -3,14 +3,22 @@ AegisTrade — Multi-DEX Router
 """
 from __future__ import annotations
 import asyncio
-from typing import Dict, List, Optional
+import time
+from typing import Collection, Dict, List, Optional, Tuple
 
-from backend.config.config import PREFERRED_DEX_ORDER, DRY_RUN
+from backend.config.config import (
+    PREFERRED_DEX_ORDER, DRY_RUN, DEX_SCORE_TIMEOUT_S,
+    SPLIT_MIN_NOTIONAL_USD, SPLIT_MAX_ROUNDS,
+)
 from backend.execution.adapters.all_adapters import (
     BaseDEXAdapter, OrderResult,
     HyperliquidAdapter, DydxAdapter, GmxAdapter,
     ApexAdapter, KwentaAdapter, VertexAdapter,
 )
+from backend.execution.order_book import (
+    OrderBook, RouteQuote, VenueQuote, optimal_split, quote_venue,
+)
+from backend.utils.http_client import HttpClient
 from backend.utils.logger import get_logger
 
 log = get_logger(__name__)
@@ -26,15 +34,34 @@ ADAPTER_MAP: Dict[str, type] = {
 
 
 class MultiDEXRouter:
-    def __init__(self, dry_run: bool = DRY_RUN) -> None:
+    def __init__(
+        self,
+        dry_run: bool = DRY_RUN,
+        score_timeout_s: float = DEX_SCORE_TIMEOUT_S,
+        http: Optional[HttpClient] = None,
+    ) -> None:
         self.dry_run = dry_run
+        self.score_timeout_s = score_timeout_s
+        # Adapters share one pool: the caller's, or one the router owns.
+        self._owns_http = http is None
+        self.http = http or HttpClient()
         self._adapters: Dict[str, BaseDEXAdapter] = {}
+        # Latest and smoothed time each venue took to score, in seconds.
+        self.score_latency: Dict[str, float] = {}
+        self.score_latency_ewma: Dict[str, float] = {}
 
     async def start(self) -> None:
-        for name in PREFERRED_DEX_ORDER:
-            cls = ADAPTER_MAP[name]
-            adapter: BaseDEXAdapter = cls(dry_run=self.dry_run)
-            await adapter.start()
+        names = list(PREFERRED_DEX_ORDER)
+        adapters = [
+            ADAPTER_MAP[name](dry_run=self.dry_run, http=self.http) for name in names
+        ]
+        results = await asyncio.gather(
+            *(a.start() for a in adapters), return_exceptions=True
+        )
+        for name, adapter, res in zip(names, adapters, results):
+            if isinstance(res, Exception):
+                log.error("Adapter %s failed to start: %s", name, res)
+                continue
             self._adapters[name] = adapter
         log.info(
             "MultiDEXRouter started (%d adapters, dry_run=%s)",
@@ -42,31 +69,142 @@ class MultiDEXRouter:
         )
 
     async def stop(self) -> None:
-        for adapter in self._adapters.values():
-            await adapter.stop()
+        await asyncio.gather(
+            *(a.stop() for a in self._adapters.values()), return_exceptions=True
+        )
+        if self._owns_http:
+            await self.http.close()
+
+    def venue_stats(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "score_latency_ms": round(self.score_latency.get(name, 0.0) * 1000, 1),
+                "score_latency_ewma_ms": round(
+                    self.score_latency_ewma.get(name, 0.0) * 1000, 1
+                ),
+                "retry": adapter.retry.stats.snapshot(),
+                "retry_budget": round(adapter.retry.budget.tokens, 2),
+            }
+            for name, adapter in self._adapters.items()
+        }
+
+    def _record_latency(self, name: str, elapsed: float) -> None:
+        self.score_latency[name] = elapsed
+        prev = self.score_latency_ewma.get(name)
+        self.score_latency_ewma[name] = (
+            elapsed if prev is None else 0.8 * prev + 0.2 * elapsed
+        )
+
+    async def _score(
+        self, name: str, adapter: BaseDEXAdapter,
+        symbol: str, qty: float, price: float,
+    ) -> Optional[Tuple[float, str]]:
+        started = time.perf_counter()
+        try:
+            fee, liq = await asyncio.wait_for(
+                asyncio.gather(
+                    adapter.cached_fee_estimate(symbol, qty),
+                    adapter.cached_liquidity(symbol, qty, price),
+                ),
+                self.score_timeout_s,
+            )
+        except asyncio.TimeoutError:
+            log.warning("Scoring %s timed out after %.2fs", name, self.score_timeout_s)
+            return None
+        except Exception as e:
+            log.debug("Score error for %s: %s", name, e)
+            return None
+        finally:
+            self._record_latency(name, time.perf_counter() - started)
+        return (fee, name) if liq else None
 
     async def _select_best_dex(
         self, symbol: str, qty: float, price: float
     ) -> List[str]:
-        scores = []
-        for name in PREFERRED_DEX_ORDER:
-            adapter = self._adapters.get(name)
-            if not adapter:
-                continue
-            try:
-                fee = await adapter.get_fee_estimate(symbol, qty)
-                liq = await adapter.check_liquidity(symbol, qty, price)
-                if liq:
-                    scores.append((fee, name))
-            except Exception as e:
-                log.debug("Score error for %s: %s", name, e)
-        scores.sort(key=lambda x: x[0])
+        venues = [
+            (name, self._adapters[name])
+            for name in PREFERRED_DEX_ORDER if name in self._adapters
+        ]
+        results = await asyncio.gather(*(
+            self._score(name, adapter, symbol, qty, price)
+            for name, adapter in venues
+        ))
+        # Stable sort: equal fees keep the preferred order.
+        scores = sorted((r for r in results if r), key=lambda x: x[0])
         return [name for _, name in scores]
 
+    async def _book(
+        self, name: str, adapter: BaseDEXAdapter,
+        symbol: str, qty: float, price: float,
+    ) -> Optional[Tuple[OrderBook, float]]:
+        try:
+            book, fee = await asyncio.wait_for(
+                asyncio.gather(
+                    adapter.cached_order_book(symbol, price),
+                    adapter.cached_fee_estimate(symbol, qty),
+                ),
+                self.score_timeout_s,
+            )
+        except asyncio.TimeoutError:
+            log.warning("Order book for %s timed out after %.2fs", name, self.score_timeout_s)
+            return None
+        except Exception as e:
+            log.debug("Order book error for %s: %s", name, e)
+            return None
+        return book, fee
+
+    async def quote(
+        self, symbol: str, side: str, qty: float, price: float,
+        exclude: Collection[str] = (),
+    ) -> Optional[RouteQuote]:
+        """
+        Expected fill for ``qty`` from each venue's book: the cheapest single
+        venue or, when cheaper all-in, a split across venues. None when no
+        venue has a book.
+        """
+        names = [
+            n for n in PREFERRED_DEX_ORDER
+            if n in self._adapters and n not in exclude
+        ]
+        results = await asyncio.gather(*(
+            self._book(n, self._adapters[n], symbol, qty, price) for n in names
+        ))
+        books = {n: r for n, r in zip(names, results) if r}
+        if not books:
+            return None
+
+        singles = [
+            quote_venue(n, book, side, qty, fee, price)
+            for n, (book, fee) in books.items()
+        ]
+        # Stable sort: equal costs keep the preferred order.
+        singles = sorted(
+            (q for q in singles if q.qty >= qty),
+            key=lambda q: _all_in_cost([q], side),
+        )
+        split = optimal_split(books, side, qty, price, SPLIT_MIN_NOTIONAL_USD)
+        best = singles[:1]
+        if not best or (
+            sum(a.qty for a in split) > qty - 1e-12
+            and _all_in_cost(split, side) < _all_in_cost(best, side)
+        ):
+            best = split
+        return RouteQuote(symbol, side, qty, price, best, singles)
+
     async def route_order(
         self, symbol: str, side: str, qty: float, price: float
     ) -> OrderResult:
-        ordered = await self._select_best_dex(symbol, qty, price)
+        ordered, quote = await asyncio.gather(
+            self._select_best_dex(symbol, qty, price),
+            self.quote(symbol, side, qty, price),
+        )
+        if quote and quote.is_split:
+            return await self._execute_split(quote)
+        if quote and quote.single_venue:
+            # Cheapest expected fill first; venues whose book cannot take
+            # the whole order keep their fee order behind them.
+            rank = {q.dex: i for i, q in enumerate(quote.single_venue)}
+            ordered.sort(key=lambda n: rank.get(n, len(rank)))
         if not ordered:
             ordered = list(PREFERRED_DEX_ORDER)
 
@@ -77,6 +215,7 @@ class MultiDEXRouter:
             log.info("Routing %s %s %s to %s", side, qty, symbol, dex_name)
             result = await adapter.place_order(symbol, side, qty, price)
             if result.success:
+                adapter.invalidate(symbol)
                 log.info(
                     "Filled on %s: price=%.4f qty=%.6f fee=%.4f",
                     dex_name, result.filled_price, result.filled_qty, result.fee
@@ -87,21 +226,110 @@ class MultiDEXRouter:
         return OrderResult(False, "none", error="All DEX adapters failed")
 
     async def split_order(
-        self, symbol: str, side: str, qty: float, price: float, parts: int = 2
-    ) -> List[OrderResult]:
-        split_qty = round(qty / parts, 8)
-        ordered = await self._select_best_dex(symbol, split_qty, price)
-        results = []
-        for dex_name in ordered[:parts]:
-            adapter = self._adapters.get(dex_name)
-            if not adapter:
-                continue
-            result = await adapter.place_order(symbol, side, split_qty, price)
-            results.append(result)
-        return results
+        self, symbol: str, side: str, qty: float, price: float
+    ) -> OrderResult:
+        """Fill ``qty`` across venues as ``quote`` allocates it."""
+        quote = await self.quote(symbol, side, qty, price)
+        if quote is None:
+            return OrderResult(False, "none", error="No venue order books")
+        return await self._execute_split(quote)
+
+    async def _place_child(
+        self, dex: str, symbol: str, side: str, qty: float, price: float
+    ) -> OrderResult:
+        adapter = self._adapters[dex]
+        try:
+            result = await adapter.place_order(symbol, side, qty, price)
+        except Exception as e:
+            return OrderResult(False, dex, error=str(e))
+        if result.success:
+            adapter.invalidate(symbol)
+        return result
+
+    async def _execute_split(self, quote: RouteQuote) -> OrderResult:
+        """
+        Send the child orders of ``quote`` concurrently. Whatever a venue
+        fails or only partly fills is re-quoted across the venues not yet
+        exhausted, for up to SPLIT_MAX_ROUNDS rounds.
+        """
+        symbol, side, price = quote.symbol, quote.side, quote.ref_price
+        allocations = [(a.dex, round(a.qty, 8)) for a in quote.allocations]
+        remaining = quote.qty
+        fills: List[OrderResult] = []
+        errors: List[str] = []
+        exhausted = set()
+        for _ in range(SPLIT_MAX_ROUNDS):
+            log.info(
+                "Splitting %s %s %s: %s", side, remaining, symbol,
+                ", ".join(f"{dex}={qty}" for dex, qty in allocations),
+            )
+            results = await asyncio.gather(*(
+                self._place_child(dex, symbol, side, qty, price)
+                for dex, qty in allocations
+            ))
+            for (dex, qty), result in zip(allocations, results):
+                if not result.success:
+                    log.warning("Child order failed on %s: %s", dex, result.error)
+                    errors.append(f"{dex}: {result.error}")
+                    exhausted.add(dex)
+                    continue
+                # A live venue reporting no fill filled nothing; only the
+                # simulator may leave filled_qty unset.
+                filled = result.filled_qty
+                if result.simulated and not filled:
+                    filled = result.filled_qty = qty
+                if filled > 0:
+                    fills.append(result)
+                    remaining -= filled
+                if filled < qty:
+                    exhausted.add(dex)
+            remaining = round(remaining, 8)
+            if remaining <= 0:
+                break
+            requote = await self.quote(symbol, side, remaining, price, exhausted)
+            if requote is None or not requote.allocations:
+                break
+            allocations = [(a.dex, round(a.qty, 8)) for a in requote.allocations]
+
+        result = _aggregate(fills, errors)
+        if result.success:
+            log.info(
+                "Filled on %s: vwap=%.4f qty=%.6f fee=%.4f",
+                result.dex, result.filled_price, result.filled_qty, result.fee
+            )
+        if remaining > 0:
+            log.warning("Split %s %s left %.8f unfilled", side, symbol, remaining)
+        return result
 
     async def cancel(self, dex: str, order_id: str) -> bool:
         adapter = self._adapters.get(dex)
         if adapter:
             return await adapter.cancel_order(order_id)
         return False
+
+
+def _all_in_cost(allocs: List[VenueQuote], side: str) -> float:
+    """Cash out for a buy, or minus cash in for a sell, fees included."""
+    total = sum(a.qty * a.all_in_price(side) for a in allocs)
+    return total if side == "long" else -total
+
+
+def _aggregate(fills: List[OrderResult], errors: List[str]) -> OrderResult:
+    """One fill at the VWAP of ``fills``; the child results stay attached."""
+    qty = sum(f.filled_qty for f in fills)
+    if qty <= 0:
+        return OrderResult(
+            False, "none", error="; ".join(errors) or "All child orders failed"
+        )
+    dexes = list(dict.fromkeys(f.dex for f in fills))
+    return OrderResult(
+        success=True,
+        dex="+".join(dexes),
+        order_id=",".join(f.order_id for f in fills),
+        filled_price=sum(f.filled_price * f.filled_qty for f in fills) / qty,
+        filled_qty=qty,
+        fee=sum(f.fee for f in fills),
+        error="; ".join(errors),
+        simulated=all(f.simulated for f in fills),
+        children=fills,
+    )
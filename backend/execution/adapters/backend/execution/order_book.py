@@ -0,0 +1,177 @@
+"""
+AegisTrade — Order Book
+L2 snapshots, fill-price estimation and the cheapest allocation of an order
+across venues.
+"""
+from __future__ import annotations
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+Level = Tuple[float, float]  # (price, size)
+
+
+@dataclass
+class OrderBook:
+    symbol: str
+    bids: List[Level]  # best (highest) first
+    asks: List[Level]  # best (lowest) first
+    ts: float = field(default_factory=time.time)
+
+    def side_for(self, side: str) -> List[Level]:
+        """Levels a ``side`` ("long" buys, "short" sells) order consumes."""
+        return self.asks if side == "long" else self.bids
+
+    @property
+    def mid(self) -> Optional[float]:
+        if not self.bids or not self.asks:
+            return None
+        return (self.bids[0][0] + self.asks[0][0]) / 2
+
+
+def synthetic_book(
+    symbol: str,
+    price: float,
+    levels: int,
+    level_notional: float,
+    tick_pct: float,
+) -> OrderBook:
+    """Evenly stepped book around ``price``, ``level_notional`` per level."""
+    size = level_notional / price if price > 0 else 0.0
+    bids = [(price * (1 - tick_pct * (i + 1)), size) for i in range(levels)]
+    asks = [(price * (1 + tick_pct * (i + 1)), size) for i in range(levels)]
+    return OrderBook(symbol, bids, asks)
+
+
+def walk_book(levels: List[Level], qty: float) -> Tuple[float, float]:
+    """(filled qty, VWAP) of taking ``qty`` through ``levels``."""
+    remaining = qty
+    notional = 0.0
+    for px, sz in levels:
+        if remaining <= 0:
+            break
+        take = min(sz, remaining)
+        notional += take * px
+        remaining -= take
+    filled = qty - max(remaining, 0.0)
+    return filled, (notional / filled if filled > 0 else 0.0)
+
+
+def slippage_pct(side: str, vwap: float, ref_price: float) -> float:
+    """Adverse move of the fill price from ``ref_price`` (positive = worse)."""
+    if ref_price <= 0 or vwap <= 0:
+        return 0.0
+    move = (vwap - ref_price) / ref_price
+    return move if side == "long" else -move
+
+
+@dataclass
+class VenueQuote:
+    dex: str
+    qty: float
+    vwap: float
+    fee_pct: float
+    slippage_pct: float
+
+    @property
+    def notional(self) -> float:
+        return self.qty * self.vwap
+
+    def all_in_price(self, side: str) -> float:
+        """Fill price including fees, per unit."""
+        if side == "long":
+            return self.vwap * (1 + self.fee_pct)
+        return self.vwap * (1 - self.fee_pct)
+
+
+@dataclass
+class RouteQuote:
+    symbol: str
+    side: str
+    qty: float
+    ref_price: float
+    allocations: List[VenueQuote]
+    # Every venue that could take the whole order alone, cheapest first.
+    single_venue: List[VenueQuote] = field(default_factory=list)
+
+    @property
+    def filled_qty(self) -> float:
+        return sum(a.qty for a in self.allocations)
+
+    @property
+    def vwap(self) -> float:
+        q = self.filled_qty
+        return sum(a.notional for a in self.allocations) / q if q else 0.0
+
+    @property
+    def fee_pct(self) -> float:
+        n = sum(a.notional for a in self.allocations)
+        return sum(a.notional * a.fee_pct for a in self.allocations) / n if n else 0.0
+
+    @property
+    def slippage_pct(self) -> float:
+        return slippage_pct(self.side, self.vwap, self.ref_price)
+
+    @property
+    def is_split(self) -> bool:
+        return len(self.allocations) > 1
+
+
+def quote_venue(
+    dex: str, book: OrderBook, side: str, qty: float, fee_pct: float, ref_price: float
+) -> VenueQuote:
+    filled, vwap = walk_book(book.side_for(side), qty)
+    return VenueQuote(dex, filled, vwap, fee_pct, slippage_pct(side, vwap, ref_price))
+
+
+def optimal_split(
+    books: Dict[str, Tuple[OrderBook, float]],
+    side: str,
+    qty: float,
+    ref_price: float,
+    min_notional: float = 0.0,
+) -> List[VenueQuote]:
+    """
+    Cheapest allocation of ``qty`` across venues, given each venue's book
+    and fee rate. Fees are proportional, so every level has a fixed all-in
+    price and taking levels in all-in order across venues is optimal.
+    Allocations below ``min_notional`` are dropped and re-planned without
+    that venue.
+    """
+    sign = 1.0 if side == "long" else -1.0
+    heap: List[Tuple[float, str, int]] = []
+    for dex, (book, fee) in books.items():
+        levels = book.side_for(side)
+        if levels:
+            px = levels[0][0] * (1 + sign * fee)
+            heapq.heappush(heap, (sign * px, dex, 0))
+
+    taken: Dict[str, List[Level]] = {}
+    remaining = qty
+    while heap and remaining > 0:
+        _, dex, i = heapq.heappop(heap)
+        book, fee = books[dex]
+        levels = book.side_for(side)
+        px, sz = levels[i]
+        take = min(sz, remaining)
+        taken.setdefault(dex, []).append((px, take))
+        remaining -= take
+        if i + 1 < len(levels):
+            nxt = levels[i + 1][0] * (1 + sign * fee)
+            heapq.heappush(heap, (sign * nxt, dex, i + 1))
+
+    allocs = []
+    for dex, fills in taken.items():
+        q = sum(sz for _, sz in fills)
+        vwap = sum(px * sz for px, sz in fills) / q
+        allocs.append(VenueQuote(
+            dex, q, vwap, books[dex][1], slippage_pct(side, vwap, ref_price)
+        ))
+
+    small = [a.dex for a in allocs if a.notional < min_notional]
+    if small and len(small) < len(allocs):
+        rest = {d: b for d, b in books.items() if d not in small}
+        return optimal_split(rest, side, qty, ref_price, min_notional)
+    allocs.sort(key=lambda a: -a.qty)
+    return allocs
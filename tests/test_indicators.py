@@ -0,0 +1,129 @@
+"""
+Indicators against the list-based helpers they replaced in the strategy
+engine: _atr, _highest_high, _lowest_low and the inline 14-bar RSI.
+"""
+import numpy as np
+import pytest
+
+from backend.strategy.indicators import (
+    ATR, RSI, RollingMax, RollingMin, _RollingExtreme, _wilder,
+    atr, rolling_max, rolling_min, rsi,
+)
+
+
+# ── reference implementations (pre-indicator strategy code) ──────────────────
+
+def ref_atr(high, low, close, period):
+    if len(close) < period + 1:
+        return 0.0
+    trs = [
+        max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        for i in range(1, len(close))
+    ]
+    return sum(trs[-period:]) / period
+
+
+def ref_highest_high(high, n):
+    return max(high[-n:])
+
+
+def ref_lowest_low(low, n):
+    return min(low[-n:])
+
+
+def ref_rsi(closes, period=14):
+    gains = [max(closes[i] - closes[i - 1], 0) for i in range(-period, 0)]
+    losses = [max(closes[i - 1] - closes[i], 0) for i in range(-period, 0)]
+    avg_gain = sum(gains) / period
+    avg_loss = sum(losses) / period
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def ref_wilder(x, period):
+    out = np.full(len(x), np.nan)
+    if len(x) < period:
+        return out
+    out[period - 1] = x[:period].mean()
+    for i in range(period, len(x)):
+        out[i] = out[i - 1] * (period - 1) / period + x[i] / period
+    return out
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))
+    spread = np.abs(rng.normal(0, 0.5, 400))
+    high = close + spread
+    low = close - spread
+    return high, low, close
+
+
+# ── tests ────────────────────────────────────────────────────────────────────
+
+def test_rolling_extreme_is_abstract():
+    with pytest.raises(TypeError):
+        _RollingExtreme(5)
+
+
+@pytest.mark.parametrize("period", [1, 14, 20, 55])
+def test_atr_sma_matches_reference(bars, period):
+    high, low, close = bars
+    vec = atr(high, low, close, period, smoothing="sma")
+    stream = ATR(period, smoothing="sma")
+    for i in range(len(close)):
+        live = stream.update(high[i], low[i], close[i])
+        if i < period:
+            assert np.isnan(vec[i]) and live is None
+            continue
+        expected = ref_atr(high[:i + 1], low[:i + 1], close[:i + 1], period)
+        assert vec[i] == pytest.approx(expected, rel=1e-9)
+        assert live == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.parametrize("period", [1, 10, 20, 55])
+def test_rolling_extremes_match_reference(bars, period):
+    high, low, _ = bars
+    vec_max, vec_min = rolling_max(high, period), rolling_min(low, period)
+    stream_max, stream_min = RollingMax(period), RollingMin(period)
+    for i in range(len(high)):
+        live_max, live_min = stream_max.update(high[i]), stream_min.update(low[i])
+        if i + 1 < period:
+            continue
+        assert vec_max[i] == live_max == ref_highest_high(high[:i + 1], period)
+        assert vec_min[i] == live_min == ref_lowest_low(low[:i + 1], period)
+
+
+def test_rsi_sma_matches_reference(bars):
+    _, _, close = bars
+    vec = rsi(close, 14, smoothing="sma")
+    stream = RSI(14, smoothing="sma")
+    for i in range(len(close)):
+        live = stream.update(close[i])
+        if i < 14:
+            assert np.isnan(vec[i]) and live is None
+            continue
+        expected = ref_rsi(list(close[:i + 1]))
+        assert vec[i] == pytest.approx(expected, rel=1e-9)
+        assert live == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.parametrize("period", [1, 2, 14, 100])
+@pytest.mark.parametrize("n", [0, 5, 14, 15, 5000])
+def test_wilder_matches_recursion(period, n):
+    x = np.random.default_rng(n + period).normal(0, 5, n)
+    np.testing.assert_allclose(
+        _wilder(x, period), ref_wilder(x, period), rtol=1e-10, atol=1e-12
+    )
+
+
+def test_wilder_atr_and_rsi_match_streaming(bars):
+    high, low, close = bars
+    vec_atr, vec_rsi = atr(high, low, close, 14), rsi(close, 14)
+    stream_atr, stream_rsi = ATR(14), RSI(14)
+    for i in range(len(close)):
+        live_atr = stream_atr.update(high[i], low[i], close[i])
+        live_rsi = stream_rsi.update(close[i])
+        if i >= 14:
+            assert vec_atr[i] == pytest.approx(live_atr, rel=1e-9)
+            assert vec_rsi[i] == pytest.approx(live_rsi, rel=1e-9)
@@ -0,0 +1,110 @@
+"""
+Hedged price lookups and the per-endpoint circuit breakers behind them.
+"""
+import asyncio
+import time
+
+import pytest
+
+from backend.feeds.price_feed import PriceFeed, Ticker
+from backend.utils.http_client import HttpClient
+from backend.utils.rate_limiter import RateLimiter
+from backend.utils.source_health import HALF_OPEN
+
+
+def _ticker(price: float) -> Ticker:
+    return Ticker(symbol="BTC-USDT", price=price, bid=price, ask=price, ts=time.time())
+
+
+def _half_open(feed: PriceFeed, key: str) -> None:
+    health = feed.health[key]
+    for _ in range(health.max_failures):
+        health.record_failure(0.01)
+    health._opened_at -= health.cooldown_s
+
+
+@pytest.fixture
+def feed():
+    # No rate-limit buckets: requests are never queued.
+    return PriceFeed(streaming=False, http=HttpClient(limiter=RateLimiter({})))
+
+
+async def test_cancelled_hedge_probe_is_handed_back(feed, monkeypatch):
+    _half_open(feed, "dydx:tickers")
+    delays = {"hyperliquid:tickers": 0.05, "dydx:tickers": 1.0}
+    monkeypatch.setattr(feed, "_hedge_delay", lambda key: delays[key])
+
+    async def slow_primary():
+        await asyncio.sleep(0.2)
+        return _ticker(1.0)
+
+    async def hung_probe():
+        await asyncio.sleep(10)
+
+    source, ticker = await feed._hedged("tickers", [
+        ("hyperliquid", slow_primary, 1),
+        ("dydx", hung_probe, 1),
+    ])
+    assert (source, ticker.price) == ("hyperliquid", 1.0)
+    # The probe was launched as the hedge and cancelled before its own
+    # hedge delay: it must not keep the endpoint locked out.
+    health = feed.health["dydx:tickers"]
+    assert health.state == HALF_OPEN
+    assert health.allow()
+
+
+async def test_outer_cancel_hands_back_probe(feed):
+    _half_open(feed, "dydx:tickers")
+    started = asyncio.Event()
+
+    async def hung_probe():
+        started.set()
+        await asyncio.sleep(10)
+
+    call = asyncio.ensure_future(feed._hedged("tickers", [("dydx", hung_probe, 1)]))
+    await asyncio.wait_for(started.wait(), 1.0)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    assert feed.health["dydx:tickers"].allow()
+
+
+async def test_batch_fallback_is_not_repeated_per_symbol(feed):
+    calls = []
+
+    async def hl_down(symbols):
+        return {}
+
+    async def dydx(symbol):
+        calls.append(("dydx", symbol))
+        return _ticker(2.0) if symbol == "BTC-USDT" else None
+
+    async def coingecko(symbol):
+        calls.append(("coingecko", symbol))
+        return None
+
+    feed._hl_tickers, feed._dydx_ticker, feed._coingecko_ticker = hl_down, dydx, coingecko
+    stale = Ticker(symbol="ETH-USDT", price=3.0, bid=3.0, ask=3.0)
+    feed._cache["ETH-USDT"] = stale
+
+    tickers = await feed.get_tickers(["BTC-USDT", "ETH-USDT"])
+    assert tickers["BTC-USDT"].price == 2.0
+    assert tickers["ETH-USDT"] is stale
+    # Each symbol went to dYdX once, in the batch; nothing was re-asked.
+    assert calls == [("dydx", "BTC-USDT"), ("dydx", "ETH-USDT")]
+
+
+async def test_symbols_missing_from_all_mids_use_per_symbol_fallback(feed):
+    calls = []
+
+    async def hl_partial(symbols):
+        return {"BTC-USDT": _ticker(1.0)}
+
+    async def dydx(symbol):
+        calls.append(symbol)
+        return Ticker(symbol=symbol, price=2.0, bid=2.0, ask=2.0)
+
+    feed._hl_tickers, feed._dydx_ticker = hl_partial, dydx
+    tickers = await feed.get_tickers(["BTC-USDT", "ETH-USDT"])
+    assert (tickers["BTC-USDT"].price, tickers["ETH-USDT"].price) == (1.0, 2.0)
+    assert calls == ["ETH-USDT"]
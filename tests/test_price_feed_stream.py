@@ -0,0 +1,141 @@
+"""
+Streaming price feed against a stand-in Hyperliquid WebSocket server.
+"""
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import backend.feeds.price_feed as price_feed
+from backend.feeds.price_feed import PriceFeed
+
+
+class StandIn:
+    def __init__(self) -> None:
+        self.subscriptions = []
+        self.sockets = []
+        self.connected = asyncio.Event()
+
+    async def handler(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        async for msg in ws:
+            self.subscriptions.append(json.loads(msg.data)["subscription"])
+            if len(self.subscriptions) == 3:
+                self.connected.set()
+        return ws
+
+    async def mids(self, **prices: str) -> None:
+        await self.sockets[-1].send_json(
+            {"channel": "allMids", "data": {"mids": prices}}
+        )
+
+
+@pytest.fixture
+async def stand_in(monkeypatch):
+    server_side = StandIn()
+    app = web.Application()
+    app.router.add_get("/ws", server_side.handler)
+    server = TestServer(app)
+    await server.start_server()
+    monkeypatch.setattr(price_feed, "HYPERLIQUID_WS", str(server.make_url("/ws")))
+    yield server_side
+    await server.close()
+
+
+async def _until(predicate, timeout: float = 2.0) -> None:
+    async def poll():
+        while not predicate():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def test_stream_subscribes_and_delivers_prices(stand_in):
+    feed = PriceFeed(streaming=True, symbols=["BTC-USDT"])
+    received = asyncio.Queue()
+
+    async def listener(ticker):
+        await received.put(ticker)
+
+    feed.add_listener(listener)
+    await feed.start()
+    try:
+        await asyncio.wait_for(stand_in.connected.wait(), 2.0)
+        assert {"type": "allMids"} in stand_in.subscriptions
+        assert {"type": "trades", "coin": "BTC"} in stand_in.subscriptions
+        await _until(lambda: feed.stream_connected)
+
+        await stand_in.mids(BTC="50000")
+        ticker = await asyncio.wait_for(received.get(), 2.0)
+        assert (ticker.symbol, ticker.price) == ("BTC-USDT", 50000.0)
+        assert (await feed.get_ticker("BTC-USDT")).price == 50000.0
+    finally:
+        await feed.stop()
+
+
+async def test_slow_listener_does_not_block_stream(stand_in):
+    feed = PriceFeed(streaming=True, symbols=["BTC-USDT"])
+    entered = asyncio.Event()
+    release = asyncio.Event()
+    seen = []
+
+    async def slow_listener(ticker):
+        seen.append(ticker.price)
+        entered.set()
+        await release.wait()
+
+    feed.add_listener(slow_listener)
+    await feed.start()
+    try:
+        await asyncio.wait_for(stand_in.connected.wait(), 2.0)
+        await _until(lambda: feed.stream_connected)
+
+        await stand_in.mids(BTC="1")
+        await asyncio.wait_for(entered.wait(), 2.0)
+        await stand_in.mids(BTC="2")
+        await stand_in.mids(BTC="3")
+        # The stream keeps reading while the listener is stuck.
+        await _until(lambda: feed._live_tickers["BTC-USDT"].price == 3.0)
+        assert seen == [1.0]
+
+        release.set()
+        await _until(lambda: len(seen) == 2)
+        # Ticks queued behind the slow listener collapse to the latest.
+        assert seen == [1.0, 3.0]
+    finally:
+        release.set()
+        await feed.stop()
+
+
+async def test_dropped_stream_falls_back_and_resubscribes(stand_in, monkeypatch):
+    monkeypatch.setattr(price_feed, "WS_RECONNECT_DELAY_S", 0.3)
+    feed = PriceFeed(streaming=True, symbols=["BTC-USDT"])
+
+    async def rest_ticker(symbol):
+        return price_feed.Ticker(symbol=symbol, price=42.0, bid=42.0, ask=42.0)
+
+    monkeypatch.setattr(feed, "_hl_ticker", rest_ticker)
+    await feed.start()
+    try:
+        await asyncio.wait_for(stand_in.connected.wait(), 2.0)
+        await _until(lambda: feed.stream_connected)
+        await stand_in.mids(BTC="50000")
+        await _until(lambda: "BTC-USDT" in feed._live_tickers)
+        assert (await feed.get_ticker("BTC-USDT")).price == 50000.0
+
+        await stand_in.sockets[-1].close()
+        await _until(lambda: not feed.stream_connected)
+        # The last streamed price is not served while the socket is down.
+        assert (await feed.get_ticker("BTC-USDT")).price == 42.0
+
+        await _until(lambda: len(stand_in.sockets) == 2 and feed.stream_connected)
+        await _until(lambda: len(stand_in.subscriptions) == 6)
+        assert stand_in.subscriptions[3:] == stand_in.subscriptions[:3]
+        await stand_in.mids(BTC="51000")
+        await _until(lambda: feed._live_tickers["BTC-USDT"].price == 51000.0)
+        assert (await feed.get_ticker("BTC-USDT")).price == 51000.0
+    finally:
+        await feed.stop()